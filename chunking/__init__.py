@@ -5,6 +5,6 @@ This module provides functionality for chunking text files into paragraphs
 for use in graph-based retrieval-augmented generation (GraphRAG) systems.
 """
 
-from .chunker import Chunk, Chunker
+from .chunker import Chunk, ChunkMeta, Chunker
 
-__all__ = ['Chunk', 'Chunker']
\ No newline at end of file
+__all__ = ['Chunk', 'ChunkMeta', 'Chunker']
\ No newline at end of file
@@ -1,49 +1,112 @@
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import multiprocessing
 import os
+import pickle
 import re
+import sys
+import tempfile
 
+# Blank-line separator. The whitespace between the two newlines excludes
+# '\n' so the two quantifiers never compete for the same characters.
+# Both patterns treat only ASCII whitespace as whitespace (re.ASCII), which
+# avoids Unicode class lookups; non-ASCII spaces such as U+00A0 are kept.
+_PARA_SPLIT_RE = re.compile(r'\n[^\S\n]*\n\s*', re.ASCII)
+_WS_COLLAPSE_RE = re.compile(r'\s+', re.ASCII)
 
-@dataclass
+# Source file suffixes, compared against the lower-cased file name.
+_SOURCE_SUFFIXES = ('.txt', '.md')
+
+# Below this many files, process start-up costs more than parallel chunking saves.
+_PARALLEL_MIN_FILES = 25
+
+
+@dataclass(slots=True)
+class ChunkMeta:
+    """Metadata describing where a chunk came from."""
+    document_name: str
+    source_file: str
+    chunk_index: int
+    file_size: int
+    chunk_length: int
+
+
+@dataclass(slots=True)
 class Chunk:
     """Represents a text chunk with metadata."""
     id: str
     text: str
-    metadata: Dict[str, Any]
+    meta: ChunkMeta
+    
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Metadata as a plain dict, built on access (e.g. for JSON logs)."""
+        meta = self.meta
+        return {
+            "document_name": meta.document_name,
+            "source_file": meta.source_file,
+            "chunk_index": meta.chunk_index,
+            "file_size": meta.file_size,
+            "chunk_length": meta.chunk_length
+        }
 
 
 class Chunker:
     """Text chunker that processes files from sources directory."""
     
-    def __init__(self, sources_dir: str = "sources"):
+    def __init__(self, sources_dir: str = "sources", read_workers: int = 16,
+                 cache_dir: Optional[str] = None):
+        """
+        Initialize the chunker.
+        
+        Args:
+            sources_dir: Directory containing the source documents
+            read_workers: Threads used to overlap file reads when the tree is too
+                small for the process pool; 1 reads serially (e.g. spinning disks)
+            cache_dir: Optional directory for caching split paragraphs per file;
+                an entry is only served while the file's size and mtime and the
+                splitter version match, so edits invalidate it
+        """
         self.sources_dir = Path(sources_dir)
+        self.read_workers = read_workers
+        self.cache = _ParagraphCache(cache_dir) if cache_dir else None
         self.chunk_counter = 0
     
-    def _discover_documents(self) -> Dict[str, List[Path]]:
-        """Discover text files and organize them by document name."""
+    def _discover_documents(self) -> Dict[str, List[Tuple[Path, int, int]]]:
+        """Discover text files and organize them by document name.
+        
+        Returns a mapping from document name to (file_path, file_size, mtime_ns).
+        """
         documents = {}
         
         if not self.sources_dir.exists():
             return documents
         
-        for file_path in self.sources_dir.rglob("*"):
-            if file_path.is_file() and file_path.suffix.lower() in ['.txt', '.md']:
-                if self._has_content(file_path):
-                    doc_name = self._get_document_name(file_path)
-                    if doc_name not in documents:
-                        documents[doc_name] = []
-                    documents[doc_name].append(file_path)
+        for entry in _walk_source_files(self.sources_dir):
+            if not self._has_content(entry):
+                continue
+            
+            stat = entry.stat()  # cached on the DirEntry
+            file_path = Path(entry.path)
+            doc_name = self._get_document_name(file_path)
+            if doc_name not in documents:
+                documents[doc_name] = []
+            documents[doc_name].append((file_path, stat.st_size, stat.st_mtime_ns))
         
         return documents
     
-    def _has_content(self, file_path: Path) -> bool:
-        """Check if file has non-empty content."""
+    @staticmethod
+    def _has_content(entry: os.DirEntry) -> bool:
+        """Check if file is non-empty without reading it.
+        
+        Whitespace-only files pass this check and are skipped after reading.
+        """
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read().strip()
-                return len(content) > 0
-        except Exception:
+            return entry.stat().st_size > 0
+        except OSError:
             return False
     
     def _get_document_name(self, file_path: Path) -> str:
@@ -55,78 +118,230 @@ class Chunker:
         else:
             return relative_path.parent.name
     
-    def _extract_paragraphs(self, text: str) -> List[str]:
-        """Extract paragraphs from text using multi-criteria approach."""
-        text = text.strip()
-        if not text:
-            return []
+    @staticmethod
+    def _extract_paragraphs(text: str) -> Iterator[str]:
+        """
+        Extract paragraphs from text using multi-criteria approach.
         
-        paragraphs = re.split(r'\n\s*\n', text)
+        Splitting, whitespace cleanup, the length filter and merging of short
+        paragraphs into their predecessor all happen in one streaming pass.
+        """
+        # Parts of the paragraph being merged; joined once when it is emitted
+        # so repeated merges do not keep copying the growing string.
+        pending: List[str] = []
         
-        cleaned_paragraphs = []
-        for para in paragraphs:
-            para = re.sub(r'\s+', ' ', para.strip())
-            if para and len(para) > 10:
-                cleaned_paragraphs.append(para)
-        
-        merged_paragraphs = []
-        for para in cleaned_paragraphs:
-            if len(para) < 50 and merged_paragraphs:
-                merged_paragraphs[-1] += " " + para
-            else:
-                merged_paragraphs.append(para)
+        # Split on the breaks themselves rather than substituting an in-band
+        # marker, so no character of the source text can act as a break.
+        for para in _PARA_SPLIT_RE.split(text.strip()):
+            para = _WS_COLLAPSE_RE.sub(' ', para).strip()
+            if len(para) <= 10:
+                continue
+            
+            if pending and len(para) >= 50:
+                yield " ".join(pending)
+                pending = []
+            pending.append(para)
         
-        return merged_paragraphs
+        if pending:
+            yield " ".join(pending)
     
-    def _create_chunk_metadata(self, doc_name: str, file_path: Path, 
-                              chunk_index: int, chunk_text: str) -> Dict[str, Any]:
+    def _create_chunk_metadata(self, doc_name: str, source_file: str,
+                              chunk_index: int, chunk_text: str,
+                              file_size: int) -> ChunkMeta:
         """Create metadata for a chunk."""
-        return {
-            "document_name": doc_name,
-            "source_file": str(file_path),
-            "chunk_index": chunk_index,
-            "file_size": file_path.stat().st_size,
-            "chunk_length": len(chunk_text)
-        }
+        return ChunkMeta(
+            document_name=doc_name,
+            source_file=source_file,
+            chunk_index=chunk_index,
+            file_size=file_size,
+            chunk_length=len(chunk_text)
+        )
     
-    def generate_chunks(self) -> Optional[List[Chunk]]:
-        """Generate chunks from all documents in sources directory."""
-        documents = self._discover_documents()
+    def _split_files(self, file_paths: List[Path]) -> Iterator[List[str]]:
+        """Read and split files, yielding paragraph lists in input order."""
+        if len(file_paths) >= _PARALLEL_MIN_FILES:
+            with multiprocessing.Pool(max(1, (os.cpu_count() or 1) - 1)) as pool:
+                yield from pool.imap(_process_file, file_paths, chunksize=8)
+            return
         
-        if not documents:
-            return None
+        # Too few files for the process pool: overlap the reads on threads
+        # (file I/O releases the GIL), then split paragraphs in this process.
+        if self.read_workers > 1 and len(file_paths) > 1:
+            with ThreadPoolExecutor(max_workers=self.read_workers) as executor:
+                contents = list(executor.map(_read_source, file_paths))
+        else:
+            contents = map(_read_source, file_paths)
+        
+        for content in contents:
+            yield _split_source(content)
+    
+    def _process_files(
+        self, 
+        tasks: List[Tuple[str, Path, int, int]]
+    ) -> Iterator[Tuple[Tuple[str, Path, int, int], List[str]]]:
+        """Pair each task with its paragraphs, serving unchanged files from the cache."""
+        if self.cache is None:
+            yield from zip(tasks, self._split_files([task[1] for task in tasks]))
+            return
         
-        all_chunks = []
+        cached = [self.cache.load(*task[1:]) for task in tasks]
+        fresh = self._split_files([
+            task[1] for task, paragraphs in zip(tasks, cached) if paragraphs is None
+        ])
         
-        for doc_name, file_paths in documents.items():
-            doc_chunks = []
+        for task, paragraphs in zip(tasks, cached):
+            if paragraphs is None:
+                paragraphs = next(fresh)
+                self.cache.store(*task[1:], paragraphs)
+            yield task, paragraphs
+    
+    def iter_chunks(self) -> Iterator[Chunk]:
+        """Yield chunks from all documents in sources directory, file by file."""
+        documents = self._discover_documents()
+        
+        tasks = [
+            (doc_name, file_path, file_size, mtime_ns)
+            for doc_name, files in documents.items()
+            for file_path, file_size, mtime_ns in files
+        ]
+        
+        # Chunk IDs are assigned here rather than in the workers so they stay
+        # deterministic regardless of how the work was distributed.
+        for (doc_name, file_path, file_size, _), paragraphs in self._process_files(tasks):
+            if not paragraphs:
+                continue
             
-            for file_path in file_paths:
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                    
-                    paragraphs = self._extract_paragraphs(content)
-                    
-                    for chunk_index, paragraph in enumerate(paragraphs):
-                        chunk_id = f"chunk_{self.chunk_counter}"
-                        self.chunk_counter += 1
-                        
-                        metadata = self._create_chunk_metadata(
-                            doc_name, file_path, chunk_index, paragraph
-                        )
-                        
-                        chunk = Chunk(
-                            id=chunk_id,
-                            text=paragraph,
-                            metadata=metadata
-                        )
-                        
-                        doc_chunks.append(chunk)
-                
-                except Exception as e:
-                    continue
+            # Shared by every chunk of this file. Names returned from pool
+            # workers are fresh copies, so intern them to share one object
+            # per document across files as well.
+            doc_name = sys.intern(doc_name)
+            source_file = str(file_path)
             
-            all_chunks.extend(doc_chunks)
+            for chunk_index, paragraph in enumerate(paragraphs):
+                chunk_id = f"chunk_{self.chunk_counter}"
+                self.chunk_counter += 1
+                
+                meta = self._create_chunk_metadata(
+                    doc_name, source_file, chunk_index, paragraph, file_size
+                )
+                
+                yield Chunk(
+                    id=chunk_id,
+                    text=paragraph,
+                    meta=meta
+                )
+    
+    def generate_chunks(self) -> Optional[List[Chunk]]:
+        """Generate chunks from all documents in sources directory."""
+        all_chunks = list(self.iter_chunks())
+        return all_chunks if all_chunks else None
+
+
+# Version of the paragraph splitting rules; bump it whenever they change
+# (patterns, length thresholds, merging) so cached paragraphs are re-split.
+_SPLITTER_VERSION = 1
+
+
+class _ParagraphCache:
+    """On-disk cache of split paragraphs, one pickle per source file path.
+    
+    Each entry records the file size, mtime and splitter version it was built
+    from and is only served while all of them still match; a new version of a
+    file overwrites its entry, so the cache holds at most one entry per path.
+    """
+    
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir)
+    
+    def _entry_path(self, file_path: Path) -> Path:
+        key = str(file_path.resolve())
+        return self.cache_dir / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.pkl"
+    
+    def load(self, file_path: Path, file_size: int, mtime_ns: int) -> Optional[List[str]]:
+        """Return cached paragraphs for this file version, or None on a miss."""
+        try:
+            with open(self._entry_path(file_path), 'rb') as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        
+        if (not isinstance(entry, tuple) or len(entry) != 4
+                or entry[:3] != (_SPLITTER_VERSION, file_size, mtime_ns)):
+            return None
+        return entry[3]
+    
+    def store(self, file_path: Path, file_size: int, mtime_ns: int, paragraphs: List[str]) -> None:
+        """Write paragraphs for this file version; failures only cost a cache miss."""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write to a temp file and rename so concurrent readers never see
+            # a partially written entry.
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(
+                        (_SPLITTER_VERSION, file_size, mtime_ns, paragraphs), f,
+                        protocol=pickle.HIGHEST_PROTOCOL
+                    )
+                os.replace(tmp_path, self._entry_path(file_path))
+            except OSError:
+                os.unlink(tmp_path)
+                raise
+        except OSError:
+            pass
+
+
+def _walk_source_files(root: Path) -> Iterator[os.DirEntry]:
+    """Walk root top-down in sorted order, yielding entries for source files.
+    
+    Chunk IDs are assigned in walk order, so the order must not depend on the
+    file system's listing order. Like rglob, symlinked files are followed but
+    symlinked directories are not descended into.
+    """
+    stack = [root]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
         
-        return all_chunks if all_chunks else None
\ No newline at end of file
+        subdirs = []
+        for entry in entries:
+            # DirEntry type checks come from the directory listing itself,
+            # so only symlinks cost an extra stat() here.
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.name.lower().endswith(_SOURCE_SUFFIXES) and entry.is_file():
+                yield entry
+        # Reversed, so subdirectories are popped in sorted order
+        stack.extend(reversed(subdirs))
+
+
+def _read_source(file_path: Path) -> str:
+    """Read a source file as text; unreadable files read as empty."""
+    try:
+        # One read and one decode, bypassing the text-mode I/O layer
+        content = file_path.read_bytes().decode('utf-8', 'ignore')
+    except Exception:
+        return ""
+    
+    # Text mode used to translate line endings; only pay for it when needed
+    if '\r' in content:
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+    
+    return content
+
+
+def _split_source(content: str) -> List[str]:
+    """Split file content into paragraphs."""
+    # Empty and whitespace-only files are skipped here, on the single read.
+    if not content.strip():
+        return []
+    
+    return list(Chunker._extract_paragraphs(content))
+
+
+def _process_file(file_path: Path) -> List[str]:
+    """Read one file and split it into paragraphs (multiprocessing worker)."""
+    return _split_source(_read_source(file_path))
@@ -7,6 +7,7 @@ from the sources directory and generate paragraph-based chunks.
 """
 
 import sys
+from collections import Counter
 from pathlib import Path
 
 # Add the parent directory to Python path so we can import from chunking
@@ -14,6 +15,10 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from chunking import Chunker
 
+# Document whose chunks are printed as samples, and how many to show
+SAMPLE_DOCUMENT = "atinternet_texts"
+MAX_SAMPLES = 10
+
 
 def main():
     """Run the chunker and display results."""
@@ -29,28 +34,29 @@ def main():
         print("\nSample chunks (21-22):")
         print("-" * 40)
 
-        # for i, chunk in enumerate(chunks[21:23]):
+        # Single pass: tally chunks per document and collect the samples
+        docs = Counter()
+        samples = []
         for i, chunk in enumerate(chunks):
-            if chunk.metadata["document_name"] == "atinternet_texts":
-                print(f"Chunk {i+21}:")
-                print(f"  ID: {chunk.id}")
-                print(f"  Document: {chunk.metadata['document_name']}")
-                print(f"  Source: {Path(chunk.metadata['source_file']).name}")
-                print(f"  Length: {chunk.metadata['chunk_length']} chars")
-                print(
-                    f"  Text: {repr(chunk.text[:150])}{'...' if len(chunk.text) > 150 else ''}"
-                )
-                print()
+            doc_name = chunk.meta.document_name
+            docs[doc_name] += 1
+            if doc_name == SAMPLE_DOCUMENT and len(samples) < MAX_SAMPLES:
+                samples.append((i, chunk))
+
+        for i, chunk in samples:
+            print(f"Chunk {i+21}:")
+            print(f"  ID: {chunk.id}")
+            print(f"  Document: {chunk.meta.document_name}")
+            print(f"  Source: {Path(chunk.meta.source_file).name}")
+            print(f"  Length: {chunk.meta.chunk_length} chars")
+            print(
+                f"  Text: {repr(chunk.text[:150])}{'...' if len(chunk.text) > 150 else ''}"
+            )
+            print()
 
         # Display document summary
         print("Document Summary:")
         print("-" * 40)
-        docs = {}
-        for chunk in chunks:
-            doc_name = chunk.metadata["document_name"]
-            if doc_name not in docs:
-                docs[doc_name] = 0
-            docs[doc_name] += 1
 
         for doc_name, count in sorted(docs.items()):
             print(f"  {doc_name}: {count} chunks")
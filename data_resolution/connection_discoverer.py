@@ -1,14 +1,58 @@
 """Connection discovery for finding new potential relationships between entities."""
 
 import uuid
-from typing import List, Dict, Set, Tuple, Optional
-from collections import defaultdict, Counter
+from typing import List, Dict, Set, FrozenSet, Tuple, Optional, Callable
+from collections import defaultdict
 import math
+from concurrent.futures import ThreadPoolExecutor
 
-from rapidfuzz import fuzz
+import numpy as np
+from rapidfuzz import fuzz, process
 from entity_extraction.models import Entity, Relationship, EntityType, PredicateType
 from .models import ConnectionDiscovery
 
+# Composition rules for transitive inference: (A->B predicate, B->C predicate) -> A->C predicate
+_TRANSITIVE_RULES: Dict[Tuple[PredicateType, PredicateType], PredicateType] = {
+    (PredicateType.BELONGS_TO, PredicateType.BELONGS_TO): PredicateType.BELONGS_TO,
+    (PredicateType.DEPENDS_ON, PredicateType.DEPENDS_ON): PredicateType.DEPENDS_ON,
+    (PredicateType.DERIVED_FROM, PredicateType.DERIVED_FROM): PredicateType.DERIVED_FROM,
+    (PredicateType.CONTAINS, PredicateType.BELONGS_TO): PredicateType.CONTAINS,
+    (PredicateType.HAS_DEFINITION, PredicateType.DEPENDS_ON): PredicateType.HAS_DEFINITION,
+}
+
+# Predicates that can start a transitive path, and those that can appear in one at all
+_TRANSITIVE_FIRST_PREDICATES = frozenset(pred1 for pred1, _ in _TRANSITIVE_RULES)
+_COMPOSABLE_PREDICATES = _TRANSITIVE_FIRST_PREDICATES | frozenset(pred2 for _, pred2 in _TRANSITIVE_RULES)
+
+# Compact integer codes for entity types and predicates, used to bucket relationship patterns
+_ENTITY_TYPES = list(EntityType)
+_ENTITY_TYPE_CODES = {entity_type: code for code, entity_type in enumerate(_ENTITY_TYPES)}
+_PREDICATES = list(PredicateType)
+_PREDICATE_CODES = {predicate: code for code, predicate in enumerate(_PREDICATES)}
+
+# Entity type pairs (either order) whose transitive connections get a confidence boost
+_COMPAT_PAIRS = frozenset({
+    frozenset({EntityType.KPI, EntityType.METRIC}),
+    frozenset({EntityType.METRIC, EntityType.TABLE}),
+    frozenset({EntityType.COLUMN, EntityType.TABLE}),
+    frozenset({EntityType.FORMULA, EntityType.KPI}),
+})
+
+# Lowest entity similarity, as a fraction of the similarity threshold, at which any domain rule fires
+_MIN_DOMAIN_RULE_SIMILARITY = 0.6
+
+# Slack on similarity upper bounds, so floating-point rounding never drops a candidate pair
+_BOUND_TOLERANCE = 1e-9
+
+# Fallback predicates for similar entities when no pattern was learned for their types
+_DEFAULT_SUGGESTIONS: Dict[Tuple[EntityType, EntityType], PredicateType] = {
+    (EntityType.KPI, EntityType.METRIC): PredicateType.DEPENDS_ON,
+    (EntityType.METRIC, EntityType.FORMULA): PredicateType.CALCULATED_BY,
+    (EntityType.METRIC, EntityType.TABLE): PredicateType.DERIVED_FROM,
+    (EntityType.COLUMN, EntityType.TABLE): PredicateType.BELONGS_TO,
+    (EntityType.DEFINITION, EntityType.KPI): PredicateType.HAS_DEFINITION,
+}
+
 
 class ConnectionDiscoverer:
     """
@@ -25,7 +69,9 @@ class ConnectionDiscoverer:
         description_weight: float = 0.4,
         name_weight: float = 0.6,
         enable_transitive_discovery: bool = True,
-        enable_domain_rules: bool = True
+        enable_domain_rules: bool = True,
+        name_scorer: Callable[..., float] = fuzz.ratio,
+        similarity_blocking: bool = False
     ):
         """
         Initialize the connection discoverer.
@@ -36,21 +82,42 @@ class ConnectionDiscoverer:
             name_weight: Weight for name similarity  
             enable_transitive_discovery: Whether to discover transitive relationships
             enable_domain_rules: Whether to apply domain-specific connection rules
+            name_scorer: RapidFuzz scorer (0-100) for name similarity; descriptions
+                always use partial_ratio, where substring matches matter
+            similarity_blocking: Only compare entities in the similarity pass when
+                their names share a block key (first four characters of the first
+                word); faster on large entity sets, but can miss matches
         """
         self.similarity_threshold = similarity_threshold
         self.description_weight = description_weight
         self.name_weight = name_weight
         self.enable_transitive_discovery = enable_transitive_discovery
         self.enable_domain_rules = enable_domain_rules
+        self.name_scorer = name_scorer
+        self.similarity_blocking = similarity_blocking
         
         # Cache for relationship patterns
         self._relationship_patterns: Dict[Tuple[EntityType, EntityType], List[PredicateType]] = {}
         self._entity_connectivity: Dict[str, Set[str]] = defaultdict(set)
+        
+        # Highest confidence of any existing relationship per (subject_id, object_id)
+        self._rel_confidence: Dict[Tuple[str, str], float] = {}
+        
+        # Pairwise name and description scores (0-100) for the entities being analyzed,
+        # indexed through _entity_index
+        self._entity_index: Dict[str, int] = {}
+        self._name_similarity: Optional[np.ndarray] = None
+        self._description_similarity: Optional[np.ndarray] = None
+        self._lowered_attributes: List[Tuple[Dict[str, str], FrozenSet[str]]] = []
+        
+        # Entity similarity per unordered id pair, shared by all discovery passes
+        self._sim_cache: Dict[Tuple[str, str], Tuple[float, Dict[str, float]]] = {}
     
     def discover_connections(
         self, 
         entities: List[Entity], 
-        existing_relationships: List[Relationship]
+        existing_relationships: List[Relationship],
+        similarity_matrices: Optional[Tuple[np.ndarray, np.ndarray]] = None
     ) -> List[ConnectionDiscovery]:
         """
         Discover new potential connections between entities.
@@ -58,11 +125,16 @@ class ConnectionDiscoverer:
         Args:
             entities: List of entities to analyze
             existing_relationships: Existing relationships to consider
+            similarity_matrices: Name and description similarity matrices for
+                entities, as returned by compute_similarity_matrices; computed
+                here if omitted
             
         Returns:
-            List of discovered potential connections
+            List of discovered potential connections, highest confidence first
         """
-        discoveries = []
+        # Best discovery so far per (subject, object, predicate); candidates
+        # are deduplicated as the passes produce them
+        best: Dict[Tuple[str, str, PredicateType], list] = {}
         
         # Build connectivity maps from existing relationships
         self._build_connectivity_maps(entities, existing_relationships)
@@ -70,39 +142,68 @@ class ConnectionDiscoverer:
         # Extract relationship patterns
         self._extract_relationship_patterns(existing_relationships, entities)
         
-        # Method 1: Similarity-based discovery
-        similarity_discoveries = self._discover_by_similarity(entities, existing_relationships)
-        discoveries.extend(similarity_discoveries)
+        self._entity_index = {e.id: i for i, e in enumerate(entities)}
+        self._lowered_attributes = [self._lower_attributes(e.attributes) for e in entities]
+        self._sim_cache.clear()
         
-        # Method 2: Transitive relationship discovery
-        if self.enable_transitive_discovery:
-            transitive_discoveries = self._discover_transitive_relationships(entities, existing_relationships)
-            discoveries.extend(transitive_discoveries)
+        # Pairs that are already connected, shared by all discovery passes
+        existing_pairs = self._get_existing_entity_pairs(existing_relationships)
         
-        # Method 3: Domain-specific rules
-        if self.enable_domain_rules:
-            domain_discoveries = self._discover_by_domain_rules(entities, existing_relationships)
-            discoveries.extend(domain_discoveries)
+        # Group entities by type for the rule and pattern pass
+        entities_by_type = defaultdict(list)
+        for entity in entities:
+            entities_by_type[entity.type].append(entity)
+        
+        # Score all name and description pairs in one batch each. The cdist
+        # calls run in native threads without the GIL, so the transitive pass,
+        # which only needs the relationship graph, runs while they score.
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            if similarity_matrices is None:
+                matrices = executor.submit(self.compute_similarity_matrices, entities)
+            
+            # Method 2: Transitive relationship discovery
+            transitive_discoveries = []
+            if self.enable_transitive_discovery:
+                transitive_discoveries = self._discover_transitive_relationships(
+                    entities, existing_relationships, existing_pairs
+                )
+            
+            if similarity_matrices is None:
+                similarity_matrices = matrices.result()
+            self._name_similarity, self._description_similarity = similarity_matrices
+        
+        # Method 1: Similarity-based discovery
+        self._discover_by_similarity(entities, existing_pairs, best)
+        for discovery in transitive_discoveries:
+            self._offer(best, discovery)
         
-        # Method 4: Pattern-based discovery
-        pattern_discoveries = self._discover_by_patterns(entities, existing_relationships)
-        discoveries.extend(pattern_discoveries)
+        # Methods 3 and 4: Domain-specific rules and pattern-based discovery,
+        # fused into a single pass over typed entity pairs
+        self._discover_by_type_pairs(entities_by_type, existing_pairs, best)
         
-        # Remove duplicates and sort by confidence
-        unique_discoveries = self._deduplicate_discoveries(discoveries)
+        # Collect the deduplicated discoveries and sort by confidence
+        unique_discoveries = self._collect_offered(best)
         unique_discoveries.sort(key=lambda d: d.confidence, reverse=True)
         
+        # IDs are only generated for discoveries that survive deduplication
+        for discovery in unique_discoveries:
+            discovery.id = uuid.uuid4().hex
+        
         return unique_discoveries
     
     def _build_connectivity_maps(self, entities: List[Entity], relationships: List[Relationship]) -> None:
         """Build maps of entity connectivity."""
         self._entity_connectivity.clear()
+        self._rel_confidence.clear()
         
         # Build entity ID to entity mapping
         entity_map = {e.id: e for e in entities}
         
         # Build connectivity graph
         for rel in relationships:
+            key = (rel.subject_id, rel.object_id)
+            self._rel_confidence[key] = max(self._rel_confidence.get(key, 0.0), rel.confidence)
+            
             if rel.subject_id in entity_map and rel.object_id in entity_map:
                 self._entity_connectivity[rel.subject_id].add(rel.object_id)
                 self._entity_connectivity[rel.object_id].add(rel.subject_id)  # Bidirectional
@@ -112,91 +213,198 @@ class ConnectionDiscoverer:
         self._relationship_patterns.clear()
         
         entity_map = {e.id: e for e in entities}
-        pattern_counter = defaultdict(list)
-        
-        for rel in relationships:
-            subject_entity = entity_map.get(rel.subject_id)
-            object_entity = entity_map.get(rel.object_id)
-            
-            if subject_entity and object_entity:
-                type_pair = (subject_entity.type, object_entity.type)
-                pattern_counter[type_pair].append(rel.predicate)
+        n_types, n_predicates = len(_ENTITY_TYPES), len(_PREDICATES)
+        
+        # One integer code per relationship between known entities:
+        # (subject type, object type, predicate) packed into a single int
+        def relationship_codes():
+            for rel in relationships:
+                subject_entity = entity_map.get(rel.subject_id)
+                object_entity = entity_map.get(rel.object_id)
+                
+                if subject_entity and object_entity:
+                    type_pair_code = (_ENTITY_TYPE_CODES[subject_entity.type] * n_types +
+                                      _ENTITY_TYPE_CODES[object_entity.type])
+                    yield type_pair_code * n_predicates + _PREDICATE_CODES[rel.predicate]
+        
+        codes = np.fromiter(relationship_codes(), dtype=np.int64)
+        if codes.size == 0:
+            return
+        
+        # Count each (type pair, predicate) in bulk, remembering where it first occurred
+        unique_codes, first_seen, counts = np.unique(codes, return_index=True, return_counts=True)
+        type_pair_codes = unique_codes // n_predicates
+        
+        # Within each type pair: most frequent first, ties broken by first
+        # occurrence (the same order Counter.most_common produces)
+        order = np.lexsort((first_seen, -counts, type_pair_codes))
+        sorted_pairs = type_pair_codes[order]
+        starts = np.flatnonzero(np.r_[True, sorted_pairs[1:] != sorted_pairs[:-1]])
+        ends = np.r_[starts[1:], len(order)]
         
         # Store most common predicates for each entity type pair
-        for type_pair, predicates in pattern_counter.items():
-            predicate_counts = Counter(predicates)
-            common_predicates = [pred for pred, count in predicate_counts.most_common(3)]
-            self._relationship_patterns[type_pair] = common_predicates
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            type_pair_code = int(sorted_pairs[start])
+            type_pair = (_ENTITY_TYPES[type_pair_code // n_types], _ENTITY_TYPES[type_pair_code % n_types])
+            self._relationship_patterns[type_pair] = [
+                _PREDICATES[code % n_predicates] for code in unique_codes[order[start:min(end, start + 3)]].tolist()
+            ]
+    
+    def compute_similarity_matrices(self, entities: List[Entity]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compute the name and description similarity matrices (0-100) among entities.
+        
+        They only depend on the entities, so callers can compute them ahead of
+        discover_connections, e.g. while relationships are still being resolved.
+        """
+        return self._compute_similarity_matrices(entities, entities)
+    
+    def _compute_similarity_matrices(
+        self, 
+        entities_a: List[Entity], 
+        entities_b: List[Entity]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Compute name and description similarity matrices (0-100) between two entity lists."""
+        names_a = [e.name.lower() for e in entities_a]
+        names_b = [e.name.lower() for e in entities_b]
+        name_matrix = process.cdist(
+            names_a, names_b, scorer=self.name_scorer, dtype=np.float64, workers=-1
+        )
+        
+        # Description similarity only counts when both entities have one, so
+        # only those rows and columns are scored; the rest stay zero
+        described_a = [i for i, e in enumerate(entities_a) if e.description]
+        described_b = [j for j, e in enumerate(entities_b) if e.description]
+        description_matrix = np.zeros((len(entities_a), len(entities_b)), dtype=np.float64)
+        if described_a and described_b:
+            description_matrix[np.ix_(described_a, described_b)] = process.cdist(
+                [entities_a[i].description.lower() for i in described_a],
+                [entities_b[j].description.lower() for j in described_b],
+                scorer=fuzz.partial_ratio, dtype=np.float64, workers=-1
+            )
+        
+        return name_matrix, description_matrix
     
     def _discover_by_similarity(
         self, 
         entities: List[Entity], 
-        existing_relationships: List[Relationship]
-    ) -> List[ConnectionDiscovery]:
-        """Discover connections based on entity similarity."""
-        discoveries = []
-        existing_pairs = self._get_existing_entity_pairs(existing_relationships)
-        
-        for i, entity1 in enumerate(entities):
-            for entity2 in entities[i + 1:]:
-                # Skip if relationship already exists
-                if self._entities_connected(entity1.id, entity2.id, existing_pairs):
-                    continue
-                
-                # Calculate similarity
-                similarity_score, similarity_features = self._calculate_entity_similarity(entity1, entity2)
+        existing_pairs: Set[Tuple[str, str]],
+        best: Dict[Tuple[str, str, PredicateType], list]
+    ) -> None:
+        """Discover connections based on entity similarity, offering them to best."""
+        # Overall similarity from the precomputed matrices, with the same
+        # operations as _calculate_entity_similarity. Attribute overlap needs
+        # per-pair work, so where both entities have attributes its maximum of
+        # 0.2 is used and the type boost (never above 1) is left out, giving an
+        # upper bound; all other pairs get their exact score here.
+        has_attributes = np.array([bool(e.attributes) for e in entities], dtype=bool)
+        both_have_attributes = np.outer(has_attributes, has_attributes)
+        type_codes = np.array([_ENTITY_TYPE_CODES[e.type] for e in entities], dtype=np.int64)
+        type_boost = np.where(type_codes[:, None] == type_codes[None, :], 1.0, 0.8)
+        
+        base_score = (
+            self._name_similarity / 100.0 * self.name_weight +
+            self._description_similarity / 100.0 * self.description_weight
+        )
+        candidates = np.where(
+            both_have_attributes,
+            base_score + 0.2 >= self.similarity_threshold,
+            base_score * type_boost >= self.similarity_threshold
+        )
+        
+        # Optional blocking: only entities whose names share a block key are compared
+        if self.similarity_blocking:
+            block_ids = {}
+            blocks = np.array(
+                [block_ids.setdefault(self._name_block_key(e.name), len(block_ids)) for e in entities],
+                dtype=np.int64
+            )
+            candidates &= blocks[:, None] == blocks[None, :]
+        
+        # Surviving pairs (i < j) in one vectorized pass over the upper
+        # triangle; np.nonzero returns them in row-major order
+        rows, cols = np.nonzero(np.triu(candidates, k=1))
+        
+        for i, j in zip(rows.tolist(), cols.tolist()):
+            entity1, entity2 = entities[i], entities[j]
+            
+            # Skip if relationship already exists
+            if self._entities_connected(entity1.id, entity2.id, existing_pairs):
+                continue
+            
+            # Calculate similarity
+            similarity_score, similarity_features = self._calculate_entity_similarity(entity1, entity2)
+            
+            if similarity_score >= self.similarity_threshold:
+                # Suggest predicate based on entity types and similarity
+                suggested_predicate = self._suggest_predicate_from_similarity(
+                    entity1, entity2, similarity_features
+                )
                 
-                if similarity_score >= self.similarity_threshold:
-                    # Suggest predicate based on entity types and similarity
-                    suggested_predicate = self._suggest_predicate_from_similarity(
-                        entity1, entity2, similarity_features
+                if suggested_predicate:
+                    discovery = ConnectionDiscovery(
+                        id="",
+                        subject_entity_id=entity1.id,
+                        object_entity_id=entity2.id,
+                        suggested_predicate=suggested_predicate,
+                        confidence=similarity_score,
+                        discovery_method="similarity_analysis",
+                        supporting_evidence=[
+                            f"Name similarity: {similarity_features.get('name_similarity', 0):.2f}",
+                            f"Description similarity: {similarity_features.get('description_similarity', 0):.2f}",
+                            f"Attribute overlap: {similarity_features.get('attribute_overlap', 0):.2f}"
+                        ],
+                        similarity_features=similarity_features,
+                        metadata={
+                            "entity1_name": entity1.name,
+                            "entity2_name": entity2.name,
+                            "entity1_type": entity1.type.value,
+                            "entity2_type": entity2.type.value
+                        }
                     )
-                    
-                    if suggested_predicate:
-                        discovery = ConnectionDiscovery(
-                            id=str(uuid.uuid4()),
-                            subject_entity_id=entity1.id,
-                            object_entity_id=entity2.id,
-                            suggested_predicate=suggested_predicate,
-                            confidence=similarity_score,
-                            discovery_method="similarity_analysis",
-                            supporting_evidence=[
-                                f"Name similarity: {similarity_features.get('name_similarity', 0):.2f}",
-                                f"Description similarity: {similarity_features.get('description_similarity', 0):.2f}",
-                                f"Attribute overlap: {similarity_features.get('attribute_overlap', 0):.2f}"
-                            ],
-                            similarity_features=similarity_features,
-                            metadata={
-                                "entity1_name": entity1.name,
-                                "entity2_name": entity2.name,
-                                "entity1_type": entity1.type.value,
-                                "entity2_type": entity2.type.value
-                            }
-                        )
-                        discoveries.append(discovery)
-        
-        return discoveries
+                    self._offer(best, discovery)
+    
+    @staticmethod
+    def _name_block_key(name: str) -> str:
+        """Blocking key for similarity comparisons: first four characters of the first word."""
+        tokens = name.lower().split()
+        return tokens[0][:4] if tokens else ""
     
     def _discover_transitive_relationships(
         self, 
         entities: List[Entity], 
-        existing_relationships: List[Relationship]
+        existing_relationships: List[Relationship],
+        existing_pairs: Set[Tuple[str, str]]
     ) -> List[ConnectionDiscovery]:
         """Discover transitive relationships (A->B, B->C implies A->C)."""
-        discoveries = []
         entity_map = {e.id: e for e in entities}
-        existing_pairs = self._get_existing_entity_pairs(existing_relationships)
         
-        # Build relationship graph
+        # Build relationship graph from the edges that can take part in a
+        # composition rule; all other edges can never yield an inference
         outgoing_relations = defaultdict(list)
         for rel in existing_relationships:
-            outgoing_relations[rel.subject_id].append((rel.object_id, rel.predicate))
+            if rel.predicate in _COMPOSABLE_PREDICATES:
+                outgoing_relations[rel.subject_id].append((rel.object_id, rel.predicate))
         
+        # Phase 1: collect the inferred paths
+        paths = []
         for entity1 in entities:
-            # Find entities connected to entity1
-            for intermediate_id, pred1 in outgoing_relations[entity1.id]:
+            # Find entities connected to entity1 by a predicate that can start a path
+            for intermediate_id, pred1 in outgoing_relations.get(entity1.id, ()):
+                if pred1 not in _TRANSITIVE_FIRST_PREDICATES:
+                    continue
+                
+                intermediate_entity = entity_map.get(intermediate_id)
+                if not intermediate_entity:
+                    continue
+                
                 # Find entities connected to the intermediate entity
-                for target_id, pred2 in outgoing_relations[intermediate_id]:
+                for target_id, pred2 in outgoing_relations.get(intermediate_id, ()):
+                    # Determine if this transitive relationship makes sense
+                    transitive_predicate = _TRANSITIVE_RULES.get((pred1, pred2))
+                    if not transitive_predicate:
+                        continue
+                    
                     # Skip if target is the original entity (avoid cycles)
                     if target_id == entity1.id:
                         continue
@@ -206,169 +414,197 @@ class ConnectionDiscoverer:
                         continue
                     
                     target_entity = entity_map.get(target_id)
-                    intermediate_entity = entity_map.get(intermediate_id)
+                    if not target_entity:
+                        continue
                     
-                    if target_entity and intermediate_entity:
-                        # Determine if this transitive relationship makes sense
-                        transitive_predicate = self._infer_transitive_predicate(pred1, pred2)
-                        
-                        if transitive_predicate:
-                            # Calculate confidence based on the strength of intermediate relationships
-                            confidence = self._calculate_transitive_confidence(
-                                entity1, intermediate_entity, target_entity, existing_relationships
-                            )
-                            
-                            discovery = ConnectionDiscovery(
-                                id=str(uuid.uuid4()),
-                                subject_entity_id=entity1.id,
-                                object_entity_id=target_id,
-                                suggested_predicate=transitive_predicate,
-                                confidence=confidence,
-                                discovery_method="transitive_inference",
-                                supporting_evidence=[
-                                    f"{entity1.name} --[{pred1.value}]--> {intermediate_entity.name}",
-                                    f"{intermediate_entity.name} --[{pred2.value}]--> {target_entity.name}",
-                                    f"Inferred: {entity1.name} --[{transitive_predicate.value}]--> {target_entity.name}"
-                                ],
-                                similarity_features={
-                                    "transitive_strength": confidence
-                                },
-                                metadata={
-                                    "intermediate_entity_id": intermediate_id,
-                                    "intermediate_entity_name": intermediate_entity.name,
-                                    "path_predicates": [pred1.value, pred2.value]
-                                }
-                            )
-                            discoveries.append(discovery)
-        
-        return discoveries
+                    # Calculate confidence based on the strength of intermediate relationships
+                    confidence = self._calculate_transitive_confidence(
+                        entity1, intermediate_entity, target_entity
+                    )
+                    paths.append((
+                        entity1, intermediate_entity, target_entity,
+                        pred1, pred2, transitive_predicate, confidence
+                    ))
+        
+        # Phase 2: materialize discoveries for the surviving paths
+        return [
+            ConnectionDiscovery(
+                id="",
+                subject_entity_id=entity1.id,
+                object_entity_id=target_entity.id,
+                suggested_predicate=transitive_predicate,
+                confidence=confidence,
+                discovery_method="transitive_inference",
+                supporting_evidence=[
+                    f"{entity1.name} --[{pred1.value}]--> {intermediate_entity.name}",
+                    f"{intermediate_entity.name} --[{pred2.value}]--> {target_entity.name}",
+                    f"Inferred: {entity1.name} --[{transitive_predicate.value}]--> {target_entity.name}"
+                ],
+                similarity_features={
+                    "transitive_strength": confidence
+                },
+                metadata={
+                    "intermediate_entity_id": intermediate_entity.id,
+                    "intermediate_entity_name": intermediate_entity.name,
+                    "path_predicates": [pred1.value, pred2.value]
+                }
+            )
+            for (entity1, intermediate_entity, target_entity,
+                 pred1, pred2, transitive_predicate, confidence) in paths
+        ]
     
-    def _discover_by_domain_rules(
+    def _discover_by_type_pairs(
         self, 
-        entities: List[Entity], 
-        existing_relationships: List[Relationship]
-    ) -> List[ConnectionDiscovery]:
-        """Discover connections using domain-specific rules."""
-        discoveries = []
-        existing_pairs = self._get_existing_entity_pairs(existing_relationships)
-        
-        # Group entities by type
-        entities_by_type = defaultdict(list)
-        for entity in entities:
-            entities_by_type[entity.type].append(entity)
-        
-        # Rule 1: KPIs should be connected to Metrics
-        if EntityType.KPI in entities_by_type and EntityType.METRIC in entities_by_type:
-            discoveries.extend(self._apply_kpi_metric_rules(
-                entities_by_type[EntityType.KPI],
-                entities_by_type[EntityType.METRIC],
-                existing_pairs
-            ))
-        
-        # Rule 2: Metrics should be connected to Tables/Columns
-        if EntityType.METRIC in entities_by_type:
-            table_entities = entities_by_type.get(EntityType.TABLE, [])
-            column_entities = entities_by_type.get(EntityType.COLUMN, [])
+        entities_by_type: Dict[EntityType, List[Entity]], 
+        existing_pairs: Set[Tuple[str, str]],
+        best: Dict[Tuple[str, str, PredicateType], list]
+    ) -> None:
+        """Discover connections from domain rules and learned patterns in one pass over typed entity pairs."""
+        # Domain rules that apply to each (entity1 type, entity2 type) combination
+        domain_rules = defaultdict(list)
+        if self.enable_domain_rules:
+            # Rule 1: KPIs should be connected to Metrics
+            domain_rules[(EntityType.KPI, EntityType.METRIC)].append(self._apply_kpi_metric_rule)
+            # Rule 2: Metrics should be connected to Tables/Columns
+            domain_rules[(EntityType.METRIC, EntityType.TABLE)].append(self._apply_metric_table_rule)
+            domain_rules[(EntityType.METRIC, EntityType.COLUMN)].append(self._apply_metric_column_rule)
+            # Rule 3: Formulas should be connected to Metrics/KPIs
+            domain_rules[(EntityType.FORMULA, EntityType.KPI)].append(self._apply_formula_rule)
+            domain_rules[(EntityType.FORMULA, EntityType.METRIC)].append(self._apply_formula_rule)
+        
+        # Each pair is enumerated, checked for an existing connection and
+        # scored once, then offered to every rule and pattern for its types
+        type_pairs = list(domain_rules)
+        type_pairs.extend(tp for tp in self._relationship_patterns if tp not in domain_rules)
+        
+        has_attributes = np.array([bool(values) for values, _ in self._lowered_attributes], dtype=bool)
+        
+        for type_pair in type_pairs:
+            rules = domain_rules.get(type_pair, [])
+            common_predicates = self._relationship_patterns.get(type_pair, [])
+            entities1 = entities_by_type.get(type_pair[0], [])
+            entities2 = entities_by_type.get(type_pair[1], [])
+            if not entities1 or not entities2:
+                continue
+            # Pairs eligible for the pattern rule, scored together after the loop
+            pattern_pairs = []
+            pattern_similarities = []
             
-            if table_entities:
-                discoveries.extend(self._apply_metric_table_rules(
-                    entities_by_type[EntityType.METRIC],
-                    table_entities,
-                    existing_pairs
-                ))
+            # Lowest similarity at which a rule or the pattern can produce a discovery
+            min_similarity = math.inf
+            if rules:
+                min_similarity = self.similarity_threshold * _MIN_DOMAIN_RULE_SIMILARITY
+            if common_predicates:
+                min_similarity = min(min_similarity, self._min_pattern_similarity(common_predicates))
             
-            if column_entities:
-                discoveries.extend(self._apply_metric_column_rules(
-                    entities_by_type[EntityType.METRIC],
-                    column_entities,
-                    existing_pairs
-                ))
-        
-        # Rule 3: Formulas should be connected to Metrics/KPIs
-        if EntityType.FORMULA in entities_by_type:
-            formula_entities = entities_by_type[EntityType.FORMULA]
+            # Upper bound of every pair's similarity from the precomputed matrices,
+            # as in _discover_by_similarity, so only pairs that can reach
+            # min_similarity are scored exactly; np.nonzero keeps them in the
+            # order of the nested loop over both entity lists
+            index1 = np.array([self._entity_index[e.id] for e in entities1], dtype=np.int64)
+            index2 = np.array([self._entity_index[e.id] for e in entities2], dtype=np.int64)
+            block = np.ix_(index1, index2)
+            type_boost = 1.0 if type_pair[0] == type_pair[1] else 0.8
+            upper_bound = (
+                self._name_similarity[block] / 100.0 * self.name_weight +
+                self._description_similarity[block] / 100.0 * self.description_weight +
+                np.outer(has_attributes[index1], has_attributes[index2]) * 0.2
+            ) * type_boost
+            rows, cols = np.nonzero(upper_bound >= min_similarity - _BOUND_TOLERANCE)
             
-            for target_type in [EntityType.KPI, EntityType.METRIC]:
-                if target_type in entities_by_type:
-                    discoveries.extend(self._apply_formula_rules(
-                        formula_entities,
-                        entities_by_type[target_type],
-                        existing_pairs
-                    ))
-        
-        return discoveries
-    
-    def _discover_by_patterns(
-        self, 
-        entities: List[Entity], 
-        existing_relationships: List[Relationship]
-    ) -> List[ConnectionDiscovery]:
-        """Discover connections based on learned relationship patterns."""
-        discoveries = []
-        existing_pairs = self._get_existing_entity_pairs(existing_relationships)
-        
-        for entity1 in entities:
-            for entity2 in entities:
+            for i, j in zip(rows.tolist(), cols.tolist()):
+                entity1, entity2 = entities1[i], entities2[j]
                 if entity1.id == entity2.id:
                     continue
                 
                 if self._entities_connected(entity1.id, entity2.id, existing_pairs):
                     continue
                 
-                # Check if we have patterns for this entity type combination
-                type_pair = (entity1.type, entity2.type)
-                common_predicates = self._relationship_patterns.get(type_pair, [])
+                similarity, features = self._calculate_entity_similarity(entity1, entity2)
+                
+                for rule in rules:
+                    discovery = rule(entity1, entity2, similarity, features)
+                    if discovery:
+                        self._offer(best, discovery)
                 
                 if common_predicates:
-                    # Use the most common predicate for this type pair
-                    suggested_predicate = common_predicates[0]
-                    
-                    # Calculate confidence based on pattern frequency and entity similarity
-                    pattern_confidence = self._calculate_pattern_confidence(
-                        entity1, entity2, type_pair, common_predicates
-                    )
-                    
-                    if pattern_confidence >= self.similarity_threshold:
-                        discovery = ConnectionDiscovery(
-                            id=str(uuid.uuid4()),
-                            subject_entity_id=entity1.id,
-                            object_entity_id=entity2.id,
-                            suggested_predicate=suggested_predicate,
-                            confidence=pattern_confidence,
-                            discovery_method="pattern_matching",
-                            supporting_evidence=[
-                                f"Common pattern: {entity1.type.value} --[{suggested_predicate.value}]--> {entity2.type.value}",
-                                f"Pattern frequency: {len(self._relationship_patterns.get(type_pair, []))}"
-                            ],
-                            similarity_features={
-                                "pattern_strength": pattern_confidence,
-                                "pattern_frequency": len(common_predicates)
-                            },
-                            metadata={
-                                "entity_type_pair": [entity1.type.value, entity2.type.value],
-                                "available_patterns": [p.value for p in common_predicates]
-                            }
-                        )
-                        discoveries.append(discovery)
-        
-        return discoveries
+                    pattern_pairs.append((entity1, entity2))
+                    pattern_similarities.append(similarity)
+            
+            # Pattern discoveries only share keys with this type pair's rule
+            # discoveries, which were offered first, so deferring them keeps
+            # the offer order per key
+            if pattern_pairs:
+                confidences = self._calculate_pattern_confidences(common_predicates, pattern_similarities)
+                for k in np.flatnonzero(confidences >= self.similarity_threshold).tolist():
+                    entity1, entity2 = pattern_pairs[k]
+                    self._offer(best, self._apply_pattern_rule(
+                        entity1, entity2, common_predicates, float(confidences[k])
+                    ))
+    
+    def _apply_pattern_rule(
+        self, 
+        entity1: Entity, 
+        entity2: Entity, 
+        common_predicates: List[PredicateType],
+        pattern_confidence: float
+    ) -> ConnectionDiscovery:
+        """Suggest a connection based on learned relationship patterns."""
+        # Use the most common predicate for this type pair
+        suggested_predicate = common_predicates[0]
+        
+        return ConnectionDiscovery(
+            id="",
+            subject_entity_id=entity1.id,
+            object_entity_id=entity2.id,
+            suggested_predicate=suggested_predicate,
+            confidence=pattern_confidence,
+            discovery_method="pattern_matching",
+            supporting_evidence=[
+                f"Common pattern: {entity1.type.value} --[{suggested_predicate.value}]--> {entity2.type.value}",
+                f"Pattern frequency: {len(common_predicates)}"
+            ],
+            similarity_features={
+                "pattern_strength": pattern_confidence,
+                "pattern_frequency": len(common_predicates)
+            },
+            metadata={
+                "entity_type_pair": [entity1.type.value, entity2.type.value],
+                "available_patterns": [p.value for p in common_predicates]
+            }
+        )
     
     def _calculate_entity_similarity(self, entity1: Entity, entity2: Entity) -> Tuple[float, Dict[str, float]]:
-        """Calculate similarity between two entities."""
+        """Calculate similarity between two entities (memoized per unordered pair)."""
+        a, b = entity1.id, entity2.id
+        key = (a, b) if a <= b else (b, a)
+        cached = self._sim_cache.get(key)
+        if cached is not None:
+            return cached
+        
         features = {}
         
-        # Name similarity
-        name_sim = fuzz.partial_ratio(entity1.name.lower(), entity2.name.lower()) / 100.0
+        i = self._entity_index.get(entity1.id)
+        j = self._entity_index.get(entity2.id)
+        
+        # Name and description similarity, from the batch matrices when both
+        # entities were part of the current discovery run
+        if i is not None and j is not None:
+            name_sim = float(self._name_similarity[i, j]) / 100.0
+            desc_sim = float(self._description_similarity[i, j]) / 100.0
+            attrs1, attrs2 = self._lowered_attributes[i], self._lowered_attributes[j]
+        else:
+            name_sim = self.name_scorer(entity1.name.lower(), entity2.name.lower()) / 100.0
+            desc_sim = 0.0
+            if entity1.description and entity2.description:
+                desc_sim = fuzz.partial_ratio(entity1.description.lower(), entity2.description.lower()) / 100.0
+            attrs1 = self._lower_attributes(entity1.attributes)
+            attrs2 = self._lower_attributes(entity2.attributes)
         features["name_similarity"] = name_sim
-        
-        # Description similarity
-        desc_sim = 0.0
-        if entity1.description and entity2.description:
-            desc_sim = fuzz.partial_ratio(entity1.description.lower(), entity2.description.lower()) / 100.0
         features["description_similarity"] = desc_sim
         
         # Attribute overlap
-        attr_sim = self._calculate_attribute_similarity(entity1.attributes, entity2.attributes)
+        attr_sim = self._calculate_attribute_similarity(attrs1, attrs2)
         features["attribute_overlap"] = attr_sim
         
         # Type compatibility boost
@@ -382,38 +618,57 @@ class ConnectionDiscoverer:
             attr_sim * 0.2
         ) * type_boost
         
-        return overall_similarity, features
+        result = (overall_similarity, features)
+        self._sim_cache[key] = result
+        return result
+    
+    @staticmethod
+    def _lower_attributes(attrs: Dict) -> Tuple[Dict[str, str], FrozenSet[str]]:
+        """Convert attribute values to lowercase strings for comparison, with the key set."""
+        lowered = {key: str(value).lower() for key, value in attrs.items()}
+        return lowered, frozenset(lowered)
     
-    def _calculate_attribute_similarity(self, attrs1: Dict, attrs2: Dict) -> float:
-        """Calculate similarity between attribute dictionaries."""
-        if not attrs1 or not attrs2:
+    def _calculate_attribute_similarity(
+        self, 
+        attrs1: Tuple[Dict[str, str], FrozenSet[str]], 
+        attrs2: Tuple[Dict[str, str], FrozenSet[str]]
+    ) -> float:
+        """Calculate similarity between attributes prepared by _lower_attributes."""
+        values1, keys1 = attrs1
+        values2, keys2 = attrs2
+        if not values1 or not values2:
             return 0.0
         
-        common_keys = set(attrs1.keys()) & set(attrs2.keys())
+        # Identical attributes match on every key
+        if values1 == values2:
+            return 1.0
+        
+        common_keys = keys1 & keys2
         if not common_keys:
             return 0.0
         
-        total_similarity = 0.0
-        for key in common_keys:
-            val1, val2 = str(attrs1[key]).lower(), str(attrs2[key]).lower()
-            if val1 == val2:
-                total_similarity += 1.0
-            else:
-                total_similarity += fuzz.ratio(val1, val2) / 100.0
+        # fsum makes the total independent of the set's iteration order, which
+        # differs with the argument order; a pair scores the same either way round
+        total_similarity = math.fsum(
+            1.0 if values1[key] == values2[key] else fuzz.ratio(values1[key], values2[key]) / 100.0
+            for key in common_keys
+        )
         
         return total_similarity / len(common_keys)
     
     def _get_existing_entity_pairs(self, relationships: List[Relationship]) -> Set[Tuple[str, str]]:
-        """Get set of existing entity pairs (bidirectional)."""
+        """Get set of existing entity pairs, each stored once as (min_id, max_id)."""
         pairs = set()
         for rel in relationships:
-            pairs.add((rel.subject_id, rel.object_id))
-            pairs.add((rel.object_id, rel.subject_id))  # Bidirectional
+            a, b = rel.subject_id, rel.object_id
+            pairs.add((a, b) if a <= b else (b, a))
         return pairs
     
     def _entities_connected(self, entity1_id: str, entity2_id: str, existing_pairs: Set[Tuple[str, str]]) -> bool:
-        """Check if two entities are already connected."""
-        return (entity1_id, entity2_id) in existing_pairs
+        """Check if two entities are already connected (in either direction)."""
+        if entity1_id <= entity2_id:
+            return (entity1_id, entity2_id) in existing_pairs
+        return (entity2_id, entity1_id) in existing_pairs
     
     def _suggest_predicate_from_similarity(
         self, 
@@ -430,45 +685,18 @@ class ConnectionDiscoverer:
             return self._relationship_patterns[type_pair][0]
         
         # Default suggestions based on types
-        default_suggestions = {
-            (EntityType.KPI, EntityType.METRIC): PredicateType.DEPENDS_ON,
-            (EntityType.METRIC, EntityType.FORMULA): PredicateType.CALCULATED_BY,
-            (EntityType.METRIC, EntityType.TABLE): PredicateType.DERIVED_FROM,
-            (EntityType.COLUMN, EntityType.TABLE): PredicateType.BELONGS_TO,
-            (EntityType.DEFINITION, EntityType.KPI): PredicateType.HAS_DEFINITION,
-        }
-        
-        return default_suggestions.get(type_pair, PredicateType.DEPENDS_ON)
-    
-    def _infer_transitive_predicate(self, pred1: PredicateType, pred2: PredicateType) -> Optional[PredicateType]:
-        """Infer a transitive predicate from two consecutive predicates."""
-        transitive_rules = {
-            (PredicateType.BELONGS_TO, PredicateType.BELONGS_TO): PredicateType.BELONGS_TO,
-            (PredicateType.DEPENDS_ON, PredicateType.DEPENDS_ON): PredicateType.DEPENDS_ON,
-            (PredicateType.DERIVED_FROM, PredicateType.DERIVED_FROM): PredicateType.DERIVED_FROM,
-            (PredicateType.CONTAINS, PredicateType.BELONGS_TO): PredicateType.CONTAINS,
-            (PredicateType.HAS_DEFINITION, PredicateType.DEPENDS_ON): PredicateType.HAS_DEFINITION,
-        }
-        
-        return transitive_rules.get((pred1, pred2))
+        return _DEFAULT_SUGGESTIONS.get(type_pair, PredicateType.DEPENDS_ON)
     
     def _calculate_transitive_confidence(
         self, 
         entity1: Entity, 
         intermediate: Entity, 
-        entity2: Entity,
-        relationships: List[Relationship]
+        entity2: Entity
     ) -> float:
         """Calculate confidence for a transitive relationship."""
-        # Find the constituent relationships
-        rel1_confidence = 0.0
-        rel2_confidence = 0.0
-        
-        for rel in relationships:
-            if rel.subject_id == entity1.id and rel.object_id == intermediate.id:
-                rel1_confidence = max(rel1_confidence, rel.confidence)
-            elif rel.subject_id == intermediate.id and rel.object_id == entity2.id:
-                rel2_confidence = max(rel2_confidence, rel.confidence)
+        # Confidence of the constituent relationships
+        rel1_confidence = self._rel_confidence.get((entity1.id, intermediate.id), 0.0)
+        rel2_confidence = self._rel_confidence.get((intermediate.id, entity2.id), 0.0)
         
         # Transitive confidence is generally lower than constituent relationships
         base_confidence = math.sqrt(rel1_confidence * rel2_confidence) * 0.8
@@ -481,220 +709,185 @@ class ConnectionDiscoverer:
     
     def _types_compatible_for_transitivity(self, type1: EntityType, type2: EntityType) -> bool:
         """Check if entity types are compatible for transitive relationships."""
-        compatible_pairs = {
-            (EntityType.KPI, EntityType.METRIC),
-            (EntityType.METRIC, EntityType.TABLE),
-            (EntityType.COLUMN, EntityType.TABLE),
-            (EntityType.FORMULA, EntityType.KPI),
-        }
-        
-        return (type1, type2) in compatible_pairs or (type2, type1) in compatible_pairs
+        return frozenset({type1, type2}) in _COMPAT_PAIRS
     
-    def _apply_kpi_metric_rules(
+    def _apply_kpi_metric_rule(
         self, 
-        kpi_entities: List[Entity], 
-        metric_entities: List[Entity],
-        existing_pairs: Set[Tuple[str, str]]
-    ) -> List[ConnectionDiscovery]:
-        """Apply domain rules for KPI-Metric connections."""
-        discoveries = []
-        
-        for kpi in kpi_entities:
-            for metric in metric_entities:
-                if self._entities_connected(kpi.id, metric.id, existing_pairs):
-                    continue
-                
-                # Check for name/description similarity
-                similarity, features = self._calculate_entity_similarity(kpi, metric)
-                
-                if similarity >= self.similarity_threshold * 0.7:  # Lower threshold for domain rules
-                    discovery = ConnectionDiscovery(
-                        id=str(uuid.uuid4()),
-                        subject_entity_id=kpi.id,
-                        object_entity_id=metric.id,
-                        suggested_predicate=PredicateType.DEPENDS_ON,
-                        confidence=min(0.9, similarity * 1.1),
-                        discovery_method="domain_rule_kpi_metric",
-                        supporting_evidence=[
-                            "Domain rule: KPIs typically depend on metrics",
-                            f"Similarity score: {similarity:.2f}"
-                        ],
-                        similarity_features=features,
-                        metadata={
-                            "rule_type": "kpi_depends_on_metric",
-                            "kpi_name": kpi.name,
-                            "metric_name": metric.name
-                        }
-                    )
-                    discoveries.append(discovery)
-        
-        return discoveries
+        kpi: Entity, 
+        metric: Entity,
+        similarity: float,
+        features: Dict[str, float]
+    ) -> Optional[ConnectionDiscovery]:
+        """Apply the domain rule for a KPI-Metric connection."""
+        if similarity < self.similarity_threshold * 0.7:  # Lower threshold for domain rules
+            return None
+        
+        return ConnectionDiscovery(
+            id="",
+            subject_entity_id=kpi.id,
+            object_entity_id=metric.id,
+            suggested_predicate=PredicateType.DEPENDS_ON,
+            confidence=min(0.9, similarity * 1.1),
+            discovery_method="domain_rule_kpi_metric",
+            supporting_evidence=[
+                "Domain rule: KPIs typically depend on metrics",
+                f"Similarity score: {similarity:.2f}"
+            ],
+            similarity_features=features,
+            metadata={
+                "rule_type": "kpi_depends_on_metric",
+                "kpi_name": kpi.name,
+                "metric_name": metric.name
+            }
+        )
     
-    def _apply_metric_table_rules(
+    def _apply_metric_table_rule(
         self, 
-        metric_entities: List[Entity], 
-        table_entities: List[Entity],
-        existing_pairs: Set[Tuple[str, str]]
-    ) -> List[ConnectionDiscovery]:
-        """Apply domain rules for Metric-Table connections."""
-        discoveries = []
-        
-        for metric in metric_entities:
-            for table in table_entities:
-                if self._entities_connected(metric.id, table.id, existing_pairs):
-                    continue
-                
-                similarity, features = self._calculate_entity_similarity(metric, table)
-                
-                if similarity >= self.similarity_threshold * 0.6:
-                    discovery = ConnectionDiscovery(
-                        id=str(uuid.uuid4()),
-                        subject_entity_id=metric.id,
-                        object_entity_id=table.id,
-                        suggested_predicate=PredicateType.DERIVED_FROM,
-                        confidence=min(0.85, similarity * 1.0),
-                        discovery_method="domain_rule_metric_table",
-                        supporting_evidence=[
-                            "Domain rule: Metrics are typically derived from tables",
-                            f"Similarity score: {similarity:.2f}"
-                        ],
-                        similarity_features=features,
-                        metadata={
-                            "rule_type": "metric_derived_from_table",
-                            "metric_name": metric.name,
-                            "table_name": table.name
-                        }
-                    )
-                    discoveries.append(discovery)
-        
-        return discoveries
+        metric: Entity, 
+        table: Entity,
+        similarity: float,
+        features: Dict[str, float]
+    ) -> Optional[ConnectionDiscovery]:
+        """Apply the domain rule for a Metric-Table connection."""
+        if similarity < self.similarity_threshold * 0.6:
+            return None
+        
+        return ConnectionDiscovery(
+            id="",
+            subject_entity_id=metric.id,
+            object_entity_id=table.id,
+            suggested_predicate=PredicateType.DERIVED_FROM,
+            confidence=min(0.85, similarity * 1.0),
+            discovery_method="domain_rule_metric_table",
+            supporting_evidence=[
+                "Domain rule: Metrics are typically derived from tables",
+                f"Similarity score: {similarity:.2f}"
+            ],
+            similarity_features=features,
+            metadata={
+                "rule_type": "metric_derived_from_table",
+                "metric_name": metric.name,
+                "table_name": table.name
+            }
+        )
     
-    def _apply_metric_column_rules(
+    def _apply_metric_column_rule(
         self, 
-        metric_entities: List[Entity], 
-        column_entities: List[Entity],
-        existing_pairs: Set[Tuple[str, str]]
-    ) -> List[ConnectionDiscovery]:
-        """Apply domain rules for Metric-Column connections."""
-        discoveries = []
-        
-        for metric in metric_entities:
-            for column in column_entities:
-                if self._entities_connected(metric.id, column.id, existing_pairs):
-                    continue
-                
-                similarity, features = self._calculate_entity_similarity(metric, column)
-                
-                if similarity >= self.similarity_threshold * 0.7:
-                    discovery = ConnectionDiscovery(
-                        id=str(uuid.uuid4()),
-                        subject_entity_id=metric.id,
-                        object_entity_id=column.id,
-                        suggested_predicate=PredicateType.MEASURES,
-                        confidence=min(0.8, similarity * 1.0),
-                        discovery_method="domain_rule_metric_column",
-                        supporting_evidence=[
-                            "Domain rule: Metrics typically measure specific columns",
-                            f"Similarity score: {similarity:.2f}"
-                        ],
-                        similarity_features=features,
-                        metadata={
-                            "rule_type": "metric_measures_column",
-                            "metric_name": metric.name,
-                            "column_name": column.name
-                        }
-                    )
-                    discoveries.append(discovery)
-        
-        return discoveries
+        metric: Entity, 
+        column: Entity,
+        similarity: float,
+        features: Dict[str, float]
+    ) -> Optional[ConnectionDiscovery]:
+        """Apply the domain rule for a Metric-Column connection."""
+        if similarity < self.similarity_threshold * 0.7:
+            return None
+        
+        return ConnectionDiscovery(
+            id="",
+            subject_entity_id=metric.id,
+            object_entity_id=column.id,
+            suggested_predicate=PredicateType.MEASURES,
+            confidence=min(0.8, similarity * 1.0),
+            discovery_method="domain_rule_metric_column",
+            supporting_evidence=[
+                "Domain rule: Metrics typically measure specific columns",
+                f"Similarity score: {similarity:.2f}"
+            ],
+            similarity_features=features,
+            metadata={
+                "rule_type": "metric_measures_column",
+                "metric_name": metric.name,
+                "column_name": column.name
+            }
+        )
     
-    def _apply_formula_rules(
+    def _apply_formula_rule(
         self, 
-        formula_entities: List[Entity], 
-        target_entities: List[Entity],
-        existing_pairs: Set[Tuple[str, str]]
-    ) -> List[ConnectionDiscovery]:
-        """Apply domain rules for Formula connections."""
-        discoveries = []
-        
-        for formula in formula_entities:
-            for target in target_entities:
-                if self._entities_connected(formula.id, target.id, existing_pairs):
-                    continue
-                
-                similarity, features = self._calculate_entity_similarity(formula, target)
-                
-                if similarity >= self.similarity_threshold * 0.6:
-                    discovery = ConnectionDiscovery(
-                        id=str(uuid.uuid4()),
-                        subject_entity_id=target.id,  # Target is calculated by formula
-                        object_entity_id=formula.id,
-                        suggested_predicate=PredicateType.CALCULATED_BY,
-                        confidence=min(0.8, similarity * 1.0),
-                        discovery_method="domain_rule_formula",
-                        supporting_evidence=[
-                            f"Domain rule: {target.type.value}s can be calculated by formulas",
-                            f"Similarity score: {similarity:.2f}"
-                        ],
-                        similarity_features=features,
-                        metadata={
-                            "rule_type": f"{target.type.value.lower()}_calculated_by_formula",
-                            "formula_name": formula.name,
-                            "target_name": target.name
-                        }
-                    )
-                    discoveries.append(discovery)
-        
-        return discoveries
+        formula: Entity, 
+        target: Entity,
+        similarity: float,
+        features: Dict[str, float]
+    ) -> Optional[ConnectionDiscovery]:
+        """Apply the domain rule for a Formula connection."""
+        if similarity < self.similarity_threshold * 0.6:
+            return None
+        
+        return ConnectionDiscovery(
+            id="",
+            subject_entity_id=target.id,  # Target is calculated by formula
+            object_entity_id=formula.id,
+            suggested_predicate=PredicateType.CALCULATED_BY,
+            confidence=min(0.8, similarity * 1.0),
+            discovery_method="domain_rule_formula",
+            supporting_evidence=[
+                f"Domain rule: {target.type.value}s can be calculated by formulas",
+                f"Similarity score: {similarity:.2f}"
+            ],
+            similarity_features=features,
+            metadata={
+                "rule_type": f"{target.type.value.lower()}_calculated_by_formula",
+                "formula_name": formula.name,
+                "target_name": target.name
+            }
+        )
     
-    def _calculate_pattern_confidence(
+    def _calculate_pattern_confidences(
         self, 
-        entity1: Entity, 
-        entity2: Entity, 
-        type_pair: Tuple[EntityType, EntityType],
-        common_predicates: List[PredicateType]
-    ) -> float:
-        """Calculate confidence for pattern-based discovery."""
+        common_predicates: List[PredicateType],
+        similarities: List[float]
+    ) -> np.ndarray:
+        """Calculate confidences for pattern-based discovery over a batch of entity pairs."""
         # Base confidence from pattern frequency
         pattern_strength = min(1.0, len(common_predicates) / 10.0)  # Normalize to 0-1
         
-        # Entity similarity boost
-        similarity, _ = self._calculate_entity_similarity(entity1, entity2)
-        
         # Combine pattern strength with entity similarity
-        confidence = (pattern_strength * 0.6 + similarity * 0.4)
+        return pattern_strength * 0.6 + np.asarray(similarities, dtype=np.float64) * 0.4
+    
+    def _min_pattern_similarity(self, common_predicates: List[PredicateType]) -> float:
+        """Lowest entity similarity at which _calculate_pattern_confidences reaches the threshold."""
+        pattern_strength = min(1.0, len(common_predicates) / 10.0)
+        return (self.similarity_threshold - pattern_strength * 0.6) / 0.4
+    
+    def _offer(
+        self, 
+        best: Dict[Tuple[str, str, PredicateType], list], 
+        discovery: ConnectionDiscovery
+    ) -> None:
+        """Keep the highest confidence discovery per entity pair and predicate, merging evidence."""
+        key = (discovery.subject_entity_id, discovery.object_entity_id, discovery.suggested_predicate)
+        entry = best.get(key)
+        if entry is None:
+            # [kept discovery, evidence, methods]; merging starts on the first duplicate.
+            # Evidence and methods are dict keys: deduplicated, in first-seen order.
+            best[key] = [discovery, None, None]
+            return
+        
+        kept, all_evidence, all_methods = entry
+        if all_evidence is None:
+            all_evidence = entry[1] = dict.fromkeys(kept.supporting_evidence)
+            all_methods = entry[2] = {kept.discovery_method: None}
+        all_evidence.update(dict.fromkeys(discovery.supporting_evidence))
+        all_methods[discovery.discovery_method] = None
+        
+        # Earlier discoveries win ties
+        if discovery.confidence > kept.confidence:
+            entry[0] = discovery
+    
+    def _collect_offered(self, best: Dict[Tuple[str, str, PredicateType], list]) -> List[ConnectionDiscovery]:
+        """Return the kept discoveries, with evidence merged from their duplicates."""
+        unique_discoveries = []
+        for discovery, all_evidence, all_methods in best.values():
+            if all_evidence is not None:
+                discovery.supporting_evidence = list(all_evidence)
+                discovery.metadata["discovery_methods"] = list(all_methods)
+            unique_discoveries.append(discovery)
         
-        return confidence
+        return unique_discoveries
     
     def _deduplicate_discoveries(self, discoveries: List[ConnectionDiscovery]) -> List[ConnectionDiscovery]:
         """Remove duplicate discoveries, keeping the highest confidence one."""
-        # Group by entity pair and predicate
-        discovery_groups = defaultdict(list)
-        
+        best = {}
         for discovery in discoveries:
-            key = (discovery.subject_entity_id, discovery.object_entity_id, discovery.suggested_predicate)
-            discovery_groups[key].append(discovery)
-        
-        # Keep only the highest confidence discovery from each group
-        unique_discoveries = []
-        for group in discovery_groups.values():
-            if len(group) == 1:
-                unique_discoveries.append(group[0])
-            else:
-                # Keep the one with highest confidence
-                best_discovery = max(group, key=lambda d: d.confidence)
-                
-                # Merge evidence from all discoveries in the group
-                all_evidence = []
-                all_methods = []
-                
-                for d in group:
-                    all_evidence.extend(d.supporting_evidence)
-                    all_methods.append(d.discovery_method)
-                
-                best_discovery.supporting_evidence = list(set(all_evidence))
-                best_discovery.metadata["discovery_methods"] = list(set(all_methods))
-                
-                unique_discoveries.append(best_discovery)
+            self._offer(best, discovery)
         
-        return unique_discoveries
\ No newline at end of file
+        return self._collect_offered(best)
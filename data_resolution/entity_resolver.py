@@ -1,15 +1,46 @@
 """Entity resolution using fuzzy matching for deduplication."""
 
+import multiprocessing
+import os
 import string
 import uuid
-from typing import List, Dict, Set, Tuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Dict, Set, Tuple, Optional, Callable
 from collections import defaultdict
 
-from rapidfuzz import fuzz
+import numpy as np
+from rapidfuzz import fuzz, process
+from scipy.sparse import coo_matrix, csr_matrix
+from scipy.sparse.csgraph import connected_components
 
 from entity_extraction.models import Entity, EntityType
 from .models import EntityResolutionDecision, ResolutionActionType
 
+# Translation table stripping ASCII punctuation from entity names
+_PUNCT_TABLE = str.maketrans("", "", string.punctuation)
+
+# Below this many entities, process start-up costs more than parallel resolution saves.
+_PARALLEL_MIN_ENTITIES = 2000
+
+# Slack on fuzz.ratio length windows, so floating-point rounding never drops a pair
+_LENGTH_TOLERANCE = 1e-9
+
+
+@lru_cache(maxsize=4096)
+def _clean_name(name: str) -> str:
+    """Lower-case, strip and remove punctuation; cached since names repeat heavily."""
+    return name.lower().strip().translate(_PUNCT_TABLE)
+
+
+def _is_fuzz_ratio(scorer: Callable[..., float]) -> bool:
+    """Whether scorer is RapidFuzz's ratio, from any of its C++ or pure-Python builds."""
+    return (
+        getattr(scorer, "__name__", None) == "ratio"
+        and getattr(scorer, "__module__", "").startswith("rapidfuzz.fuzz")
+    )
+
 
 class EntityResolver:
     """
@@ -23,7 +54,10 @@ class EntityResolver:
         self,
         similarity_threshold: float = 80.0,
         acronym_threshold: float = 98.0,
-        enable_acronym_matching: bool = True
+        enable_acronym_matching: bool = True,
+        enable_blocking: bool = False,
+        workers: int = 1,
+        name_scorer: Callable[..., float] = fuzz.partial_ratio
     ):
         """
         Initialize the entity resolver.
@@ -32,16 +66,37 @@ class EntityResolver:
             similarity_threshold: Minimum similarity score for considering entities as duplicates
             acronym_threshold: Higher threshold for acronym matching
             enable_acronym_matching: Whether to enable acronym-based matching
+            enable_blocking: Only score name pairs that share a character 3-gram;
+                faster on large entity sets, but can miss weak substring matches
+            workers: Processes used to resolve entity types in parallel; 1 resolves
+                them in this process. Types are independent until acronym matching,
+                so the result does not depend on this setting
+            name_scorer: Symmetric RapidFuzz scorer (0-100) for cleaned entity names.
+                partial_ratio treats a name contained in another as a match; fuzz.ratio
+                is faster on short names but scores such pairs lower, so
+                similarity_threshold usually needs lowering with it
         """
         self.similarity_threshold = similarity_threshold
         self.acronym_threshold = acronym_threshold
         self.enable_acronym_matching = enable_acronym_matching
+        self.enable_blocking = enable_blocking
+        self.workers = workers
+        self.name_scorer = name_scorer
         self.canonical_entities: Dict[str, Entity] = {}  # entity_id -> canonical entity
         self.resolution_decisions: List[EntityResolutionDecision] = []
+        # Canonical entities per type and their cleaned names, in insertion order
+        self._canonical_by_type: Dict[EntityType, List[Entity]] = defaultdict(list)
+        self._canonical_names_by_type: Dict[EntityType, List[str]] = defaultdict(list)
+        # Cleaned name of every entity being resolved, keyed by entity ID
+        self._cleaned_names: Dict[str, str] = {}
+        # Pairwise name score matrices of clusters, keyed by their cleaned names
+        self._sim_cache: Dict[Tuple[str, ...], np.ndarray] = {}
+        # Timestamp shared by all decisions of a resolution run
+        self._run_timestamp = datetime.now()
     
     def clean_entity_name(self, name: str) -> str:
         """Clean entity name for comparison."""
-        return name.lower().strip().translate(str.maketrans("", "", string.punctuation))
+        return _clean_name(name)
     
     def resolve_entities(self, entities: List[Entity]) -> Tuple[List[Entity], List[EntityResolutionDecision]]:
         """
@@ -55,12 +110,21 @@ class EntityResolver:
         """
         self.canonical_entities = {}
         self.resolution_decisions = []
+        self._canonical_by_type = defaultdict(list)
+        self._canonical_names_by_type = defaultdict(list)
+        self._sim_cache = {}
+        # Names do not change during resolution, so each is cleaned once here
+        self._cleaned_names = {e.id: self.clean_entity_name(e.name) for e in entities}
+        self._run_timestamp = datetime.now()
         
         # Group entities by type for more accurate matching
         type_groups = self._group_entities_by_type(entities)
         
-        for entity_type, type_entities in type_groups.items():
-            self._resolve_entities_by_type(type_entities)
+        if self.workers > 1 and len(type_groups) > 1 and len(entities) >= _PARALLEL_MIN_ENTITIES:
+            self._resolve_type_groups_in_parallel(list(type_groups.values()))
+        else:
+            for entity_type, type_entities in type_groups.items():
+                self._resolve_entities_by_type(type_entities)
         
         # Handle acronym matching across all canonical entities
         if self.enable_acronym_matching:
@@ -71,6 +135,32 @@ class EntityResolver:
         
         return canonical_entities, self.resolution_decisions
     
+    def _resolve_type_groups_in_parallel(self, type_groups: List[List[Entity]]) -> None:
+        """Resolve each type group in a worker process, merging results in group order."""
+        settings = {
+            "similarity_threshold": self.similarity_threshold,
+            "acronym_threshold": self.acronym_threshold,
+            "enable_blocking": self.enable_blocking,
+            "name_scorer": self.name_scorer
+        }
+        max_workers = min(self.workers, len(type_groups), os.cpu_count() or 1)
+        
+        # spawn rather than the platform default (fork on Linux): the pipeline may
+        # have threads running, e.g. the similarity matrix precomputation
+        with ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            results = executor.map(
+                _resolve_type_group,
+                [settings] * len(type_groups),
+                type_groups,
+                [self._run_timestamp] * len(type_groups)
+            )
+            for canonical_entities, decisions in results:
+                for entity in canonical_entities:
+                    self._add_canonical_entity(entity)
+                self.resolution_decisions.extend(decisions)
+    
     def _group_entities_by_type(self, entities: List[Entity]) -> Dict[EntityType, List[Entity]]:
         """Group entities by their type."""
         type_groups = defaultdict(list)
@@ -92,8 +182,7 @@ class EntityResolver:
                 
             if len(cluster_entities) == 1:
                 # Single entity - add directly as canonical
-                entity = cluster_entities[0]
-                self.canonical_entities[entity.id] = entity
+                self._add_canonical_entity(cluster_entities[0])
             else:
                 # Multiple entities - need to select canonical and merge
                 self._resolve_entity_cluster(cluster_entities)
@@ -110,47 +199,128 @@ class EntityResolver:
         
         for entity in entities:
             name_to_entities[entity.name].append(entity)
-            cleaned_name_map[entity.name] = self.clean_entity_name(entity.name)
+            cleaned_name_map[entity.name] = self._cleaned_names[entity.id]
         
         unique_names = list(name_to_entities.keys())
+        
+        # Names that clean to the same string always match each other, so the
+        # match graph only needs one node per distinct cleaned name
+        cleaned_index = {}
+        name_nodes = [
+            cleaned_index.setdefault(cleaned_name_map[name], len(cleaned_index))
+            for name in unique_names
+        ]
+        
+        # Clusters are the connected components of the match graph, so names
+        # linked through an intermediate name (A~B, B~C) end up together
+        _, node_labels = connected_components(self._match_names(list(cleaned_index)), directed=False)
+        labels = node_labels[name_nodes]
+        
+        # Key each cluster by its first name, in first-seen order
         clustered = {}
-        used_names = set()
+        cluster_names = {}
+        for name, label in zip(unique_names, labels.tolist()):
+            if label not in cluster_names:
+                cluster_names[label] = name
+                clustered[name] = []
+            clustered[cluster_names[label]].extend(name_to_entities[name])
         
-        for name in unique_names:
-            if name in used_names:
-                continue
-                
-            # Start a new cluster with this name
-            cluster_entities = []
-            cluster_used_names = set()
+        return clustered
+    
+    def _match_names(self, cleaned_names: List[str]) -> csr_matrix:
+        """
+        Build the match graph: adjacency of cleaned names scoring at or above the threshold.
+        
+        Without blocking every pair is scored in one cdist call; with blocking only
+        pairs sharing a 3-gram are scored.
+        """
+        if not self.enable_blocking:
+            # Scores below score_cutoff come back as 0, so the non-zero entries are
+            # exactly the matches; uint8 keeps the dense matrix small and cannot
+            # round a match down to 0 once the threshold is at least 1
+            dtype = np.uint8 if self.similarity_threshold >= 1 else np.float64
+            scores = process.cdist(
+                cleaned_names,
+                cleaned_names,
+                scorer=self.name_scorer,
+                score_cutoff=self.similarity_threshold,
+                dtype=dtype,
+                workers=-1
+            )
+            if dtype is np.float64:
+                scores = scores >= self.similarity_threshold
+            return csr_matrix(scores)
+        
+        qgram_index = self._build_qgram_index(cleaned_names)
+        # Names shorter than a gram can match inside any name, so they are never blocked
+        short_names = [i for i, name in enumerate(cleaned_names) if len(name) < 3]
+        rows: List[int] = []
+        cols: List[int] = []
+        
+        # fuzz.ratio is at most 200 * min(len_a, len_b) / (len_a + len_b), so with it
+        # only names within a length window of each other can reach the threshold
+        lengths = np.array([len(name) for name in cleaned_names], dtype=np.float64)
+        length_bounded = _is_fuzz_ratio(self.name_scorer) and 0 < self.similarity_threshold <= 100
+        shortest = lengths.min(initial=np.inf)
+        longest = lengths.max(initial=0.0)
+        
+        for i, name in enumerate(cleaned_names):
+            if len(name) < 3:
+                candidates = range(i + 1, len(cleaned_names))
+            else:
+                candidates = set(short_names)
+                for gram in self._qgrams(name):
+                    candidates.update(qgram_index[gram])
             
-            for other_name in unique_names:
-                if other_name in used_names:
+            if length_bounded:
+                min_length = lengths[i] * self.similarity_threshold / (200 - self.similarity_threshold) - _LENGTH_TOLERANCE
+                max_length = lengths[i] * (200 - self.similarity_threshold) / self.similarity_threshold + _LENGTH_TOLERANCE
+                # Filtering only pays off when the window leaves some names out
+                if min_length > shortest or max_length < longest:
+                    candidates = np.fromiter(candidates, dtype=np.intp)
+                    candidate_lengths = lengths[candidates]
+                    candidates = candidates[
+                        (candidates > i) & (candidate_lengths >= min_length) & (candidate_lengths <= max_length)
+                    ].tolist()
+            
+            # The scorer is symmetric and the graph undirected, so each pair is scored once
+            for j in candidates:
+                if j <= i:
                     continue
-                    
-                # Calculate similarity between cleaned names
-                score = fuzz.partial_ratio(
-                    cleaned_name_map[name], 
-                    cleaned_name_map[other_name]
-                )
-                
+                # score_cutoff lets the scorer bail out early, e.g. on length alone for fuzz.ratio
+                score = self.name_scorer(name, cleaned_names[j], score_cutoff=self.similarity_threshold)
                 if score >= self.similarity_threshold:
-                    cluster_entities.extend(name_to_entities[other_name])
-                    cluster_used_names.add(other_name)
-            
-            if cluster_entities:
-                clustered[name] = cluster_entities
-                used_names.update(cluster_used_names)
+                    rows.append(i)
+                    cols.append(j)
         
-        return clustered
+        n = len(cleaned_names)
+        return coo_matrix(
+            (np.ones(len(rows), dtype=bool), (rows, cols)), shape=(n, n)
+        ).tocsr()
+    
+    @staticmethod
+    def _qgrams(name: str, q: int = 3) -> Set[str]:
+        """Character q-grams of a name (empty for names shorter than q)."""
+        return {name[i:i + q] for i in range(len(name) - q + 1)}
+    
+    @classmethod
+    def _build_qgram_index(cls, names: List[str], q: int = 3) -> Dict[str, List[int]]:
+        """Inverted index from character q-gram to the indices of names containing it."""
+        index = defaultdict(list)
+        for i, name in enumerate(names):
+            for gram in cls._qgrams(name, q):
+                index[gram].append(i)
+        return index
     
     def _resolve_entity_cluster(self, cluster_entities: List[Entity]) -> None:
         """Resolve a cluster of similar entities by selecting a canonical one."""
         if not cluster_entities:
             return
         
-        # Select the medoid (most representative) entity as canonical
-        canonical_entity = self._select_medoid_entity(cluster_entities)
+        # Select the medoid (most representative) entity as canonical; the
+        # score matrix is shared with the cluster similarity below
+        scores = self._pairwise_name_scores(cluster_entities)
+        canonical_entity = self._select_medoid_entity(cluster_entities, scores)
         
         if canonical_entity is None:
             return
@@ -165,18 +335,20 @@ class EntityResolver:
         else:
             # This becomes a new canonical entity
             final_canonical_id = canonical_entity.id
-            self.canonical_entities[canonical_entity.id] = canonical_entity
+            self._add_canonical_entity(canonical_entity)
             duplicate_ids = [e.id for e in cluster_entities if e.id != canonical_entity.id]
         
         # Record the resolution decision if we have duplicates
         if duplicate_ids:
+            cluster_similarity, confidence = self._cluster_stats(cluster_entities, scores)
             decision = EntityResolutionDecision(
-                id=str(uuid.uuid4()),
+                id=uuid.uuid4().hex,
+                timestamp=self._run_timestamp,
                 canonical_entity_id=final_canonical_id,
                 duplicate_entity_ids=duplicate_ids,
-                similarity_score=self._calculate_cluster_similarity(cluster_entities),
+                similarity_score=cluster_similarity,
                 resolution_method="fuzzy_match_medoid",
-                confidence=self._calculate_resolution_confidence(cluster_entities),
+                confidence=confidence,
                 metadata={
                     "cluster_size": len(cluster_entities),
                     "canonical_name": canonical_entity.name,
@@ -185,12 +357,17 @@ class EntityResolver:
             )
             self.resolution_decisions.append(decision)
     
-    def _select_medoid_entity(self, entities: List[Entity]) -> Optional[Entity]:
+    def _select_medoid_entity(
+        self,
+        entities: List[Entity],
+        scores: Optional[np.ndarray] = None
+    ) -> Optional[Entity]:
         """
         Select the medoid entity - the one with highest total similarity to all others.
         
         Args:
             entities: List of entities in the cluster
+            scores: Pairwise name score matrix of the cluster; computed if omitted
             
         Returns:
             The medoid entity or None if empty list
@@ -202,80 +379,98 @@ class EntityResolver:
             return entities[0]
         
         n = len(entities)
-        similarity_scores = [0.0] * n
-        
-        for i in range(n):
-            for j in range(n):
-                if i != j:
-                    cleaned_i = self.clean_entity_name(entities[i].name)
-                    cleaned_j = self.clean_entity_name(entities[j].name)
-                    similarity_scores[i] += fuzz.partial_ratio(cleaned_i, cleaned_j)
+        if scores is None:
+            scores = self._pairwise_name_scores(entities)
+        similarity_scores = np.where(np.eye(n, dtype=bool), 0.0, scores).sum(axis=1)
         
         # Select entity with highest total similarity score
-        max_idx = max(range(n), key=lambda idx: similarity_scores[idx])
-        
-        # Also consider confidence score as a tiebreaker
-        medoid = entities[max_idx]
+        max_idx = int(similarity_scores.argmax())
         
-        # If there are entities with similar similarity scores, prefer higher confidence
-        max_score = similarity_scores[max_idx]
-        candidates = [
-            entities[i] for i in range(n) 
-            if abs(similarity_scores[i] - max_score) < 10.0  # Within 10 points
-        ]
+        # If there are entities with similar similarity scores (within 10 points),
+        # prefer higher confidence; argmax keeps the first of equal confidences
+        candidates = np.flatnonzero(np.abs(similarity_scores - similarity_scores[max_idx]) < 10.0)
         
-        if len(candidates) > 1:
-            # Choose the one with highest confidence
-            medoid = max(candidates, key=lambda e: e.confidence)
+        if candidates.size > 1:
+            confidences = np.fromiter((entities[i].confidence for i in candidates), dtype=np.float64)
+            max_idx = int(candidates[confidences.argmax()])
         
-        return medoid
+        return entities[max_idx]
+    
+    def _add_canonical_entity(self, entity: Entity) -> None:
+        """Register a canonical entity, keeping the per-type buckets in step."""
+        if entity.id not in self.canonical_entities:
+            self._canonical_by_type[entity.type].append(entity)
+            self._canonical_names_by_type[entity.type].append(self._cleaned_names[entity.id])
+        self.canonical_entities[entity.id] = entity
     
     def _find_matching_canonical_entity(self, entity: Entity) -> Optional[Entity]:
-        """Find if this entity matches any existing canonical entity."""
-        cleaned_name = self.clean_entity_name(entity.name)
-        
-        best_score = 0.0
-        best_canonical = None
+        """Find if this entity matches any existing canonical entity of the same type."""
+        candidates = self._canonical_by_type.get(entity.type)
+        if not candidates:
+            return None
         
-        for canonical in self.canonical_entities.values():
-            if canonical.type != entity.type:
-                continue
-                
-            canonical_cleaned = self.clean_entity_name(canonical.name)
-            score = fuzz.partial_ratio(cleaned_name, canonical_cleaned)
-            
-            if score > best_score and score >= self.similarity_threshold:
-                best_score = score
-                best_canonical = canonical
+        match = process.extractOne(
+            self._cleaned_names[entity.id],
+            self._canonical_names_by_type[entity.type],
+            scorer=self.name_scorer,
+            score_cutoff=self.similarity_threshold
+        )
+        if match is None or match[1] <= 0:
+            return None
         
-        return best_canonical
+        return candidates[match[2]]
     
     def _merge_acronym_entities(self) -> None:
         """Merge canonical entities where one is an acronym of another."""
         if not self.enable_acronym_matching:
             return
         
-        canonical_list = list(self.canonical_entities.values())
-        multi_word_entities = [e for e in canonical_list if " " in e.name]
-        single_word_entities = [e for e in canonical_list if " " not in e.name]
-        
-        entities_to_remove = []
+        # Classify the canonical entities in one pass. Single-word entities are
+        # kept per type in canonical order, plus the first one for each
+        # upper-cased name so exact acronym matches are a dict lookup
+        multi_word_entities = []
+        single_word_by_type = defaultdict(list)
+        single_word_by_key: Dict[Tuple[EntityType, str], Entity] = {}
+        longest_single_word = defaultdict(int)
+        for entity in self.canonical_entities.values():
+            if " " in entity.name:
+                multi_word_entities.append(entity)
+            else:
+                single_word_by_type[entity.type].append(entity)
+                single_word_by_key.setdefault((entity.type, entity.name.upper()), entity)
+                longest_single_word[entity.type] = max(longest_single_word[entity.type], len(entity.name))
         
+        # The lists above are a snapshot, so merged entities can be removed as
+        # they are found; like before, a removed entity can still match a later
+        # multi-word entity
         for multi_word_entity in multi_word_entities:
+            single_word_entities = single_word_by_type.get(multi_word_entity.type)
+            if not single_word_entities:
+                continue
+            
             # Generate acronym from multi-word entity
             acronym = "".join(word[0].upper() for word in multi_word_entity.name.split())
             
-            # Look for matching single-word entities
-            for single_word_entity in single_word_entities:
-                if single_word_entity.type != multi_word_entity.type:
-                    continue
-                    
-                score = fuzz.ratio(acronym, single_word_entity.name.upper())
-                
+            # Different strings score at most 100 * (1 - 1 / (len(a) + len(b))) with
+            # fuzz.ratio; below the threshold only an exact match can qualify
+            max_inexact = 100.0 * (1 - 1 / max(1, len(acronym) + longest_single_word[multi_word_entity.type]))
+            
+            if max_inexact < self.acronym_threshold:
+                single_word_entity = single_word_by_key.get((multi_word_entity.type, acronym))
+                matches = [(single_word_entity, 100.0)] if single_word_entity else []
+            else:
+                matches = (
+                    (single_word_entity, fuzz.ratio(acronym, single_word_entity.name.upper()))
+                    for single_word_entity in single_word_entities
+                )
+            
+            # Look for the first matching single-word entity
+            for single_word_entity, score in matches:
                 if score >= self.acronym_threshold:
                     # Merge single-word entity into multi-word entity
                     decision = EntityResolutionDecision(
-                        id=str(uuid.uuid4()),
+                        id=uuid.uuid4().hex,
+                        timestamp=self._run_timestamp,
                         canonical_entity_id=multi_word_entity.id,
                         duplicate_entity_ids=[single_word_entity.id],
                         similarity_score=score / 100.0,
@@ -288,40 +483,56 @@ class EntityResolver:
                         }
                     )
                     self.resolution_decisions.append(decision)
-                    entities_to_remove.append(single_word_entity.id)
+                    self.canonical_entities.pop(single_word_entity.id, None)
                     break
-        
-        # Remove merged entities from canonical entities
-        for entity_id in entities_to_remove:
-            if entity_id in self.canonical_entities:
-                del self.canonical_entities[entity_id]
     
-    def _calculate_cluster_similarity(self, entities: List[Entity]) -> float:
-        """Calculate average similarity within a cluster."""
-        if len(entities) < 2:
-            return 1.0
-        
-        total_similarity = 0.0
-        comparisons = 0
-        
-        for i in range(len(entities)):
-            for j in range(i + 1, len(entities)):
-                cleaned_i = self.clean_entity_name(entities[i].name)
-                cleaned_j = self.clean_entity_name(entities[j].name)
-                similarity = fuzz.partial_ratio(cleaned_i, cleaned_j)
-                total_similarity += similarity
-                comparisons += 1
+    def _pairwise_name_scores(self, entities: List[Entity]) -> np.ndarray:
+        """
+        Matrix of name_scorer scores between the cleaned names of entities.
         
-        return (total_similarity / comparisons) / 100.0 if comparisons > 0 else 1.0
+        Medoid selection and the cluster statistics all score the same cluster,
+        so the matrix is computed once and cached; callers must not modify it.
+        """
+        cleaned_names = tuple(self._cleaned_names[e.id] for e in entities)
+        scores = self._sim_cache.get(cleaned_names)
+        if scores is None:
+            # Score each distinct name once, then expand to the full cluster
+            cleaned_index = {}
+            name_nodes = np.array(
+                [cleaned_index.setdefault(name, len(cleaned_index)) for name in cleaned_names],
+                dtype=np.intp
+            )
+            distinct_names = list(cleaned_index)
+            scores = process.cdist(
+                distinct_names,
+                distinct_names,
+                scorer=self.name_scorer,
+                dtype=np.float64,
+                workers=-1
+            )[np.ix_(name_nodes, name_nodes)]
+            self._sim_cache[cleaned_names] = scores
+        return scores
     
-    def _calculate_resolution_confidence(self, entities: List[Entity]) -> float:
-        """Calculate confidence in the resolution decision."""
+    def _cluster_stats(
+        self,
+        entities: List[Entity],
+        scores: Optional[np.ndarray] = None
+    ) -> Tuple[float, float]:
+        """
+        Calculate average similarity within a cluster and confidence in resolving it.
+        
+        Returns:
+            Tuple of (cluster_similarity, resolution_confidence)
+        """
         if len(entities) < 2:
-            return 1.0
+            return 1.0, 1.0
+        
+        if scores is None:
+            scores = self._pairwise_name_scores(entities)
+        cluster_similarity = float(scores[np.triu_indices(len(entities), k=1)].mean()) / 100.0
         
         # Base confidence on average entity confidence and similarity
         avg_entity_confidence = sum(e.confidence for e in entities) / len(entities)
-        cluster_similarity = self._calculate_cluster_similarity(entities)
         
         # Weight both factors
         confidence = (avg_entity_confidence + cluster_similarity) / 2.0
@@ -330,4 +541,17 @@ class EntityResolver:
         if cluster_similarity > 0.9:
             confidence = min(1.0, confidence + 0.1)
         
-        return confidence
\ No newline at end of file
+        return cluster_similarity, confidence
+
+
+def _resolve_type_group(
+    settings: Dict[str, object],
+    entities: List[Entity],
+    run_timestamp: datetime
+) -> Tuple[List[Entity], List[EntityResolutionDecision]]:
+    """Resolve one entity type group (process pool worker)."""
+    resolver = EntityResolver(**settings)
+    resolver._cleaned_names = {e.id: resolver.clean_entity_name(e.name) for e in entities}
+    resolver._run_timestamp = run_timestamp
+    resolver._resolve_entities_by_type(entities)
+    return list(resolver.canonical_entities.values()), resolver.resolution_decisions
@@ -1,12 +1,20 @@
 """Relationship resolution for deduplicating and consolidating relationships."""
 
-import uuid
-from typing import List, Dict, Tuple, Optional
+import os
+from typing import List, Dict, Tuple, Optional, Iterable, Union
 from collections import defaultdict
 
+import numpy as np
+
 from entity_extraction.models import Relationship
 from .models import RelationshipResolutionDecision, ResolutionActionType
 
+# Below this many scores, a numpy weighted average costs more than the Python loops
+_NUMPY_MIN_WEIGHTED = 64
+
+# Decision IDs drawn per os.urandom call
+_DECISION_ID_BATCH = 1024
+
 
 class RelationshipResolver:
     """
@@ -19,7 +27,7 @@ class RelationshipResolver:
     4. Confidence score consolidation
     """
     
-    def __init__(self, confidence_consolidation_method: str = "max"):
+    def __init__(self, confidence_consolidation_method: str = "max", record_metadata: bool = True):
         """
         Initialize the relationship resolver.
         
@@ -28,9 +36,20 @@ class RelationshipResolver:
                 - "max": Take the maximum confidence
                 - "average": Average all confidence scores  
                 - "weighted": Weighted average based on context length
+            record_metadata: Attach per-decision metadata (canonical form, original
+                confidences, ...); disable to skip building it when it is not read
         """
         self.confidence_consolidation_method = confidence_consolidation_method
+        self.record_metadata = record_metadata
+        # Consolidation function for the method, chosen once; defaults to max
+        self._consolidate_confidence = {
+            "max": self._max_confidence,
+            "average": self._average_confidence,
+            "weighted": self._weighted_confidence
+        }.get(confidence_consolidation_method, self._max_confidence)
         self.resolution_decisions: List[RelationshipResolutionDecision] = []
+        self._stats = self._empty_stats()
+        self._decision_ids: List[str] = []
     
     def resolve_relationships(
         self, 
@@ -48,17 +67,21 @@ class RelationshipResolver:
             Tuple of (resolved_relationships, resolution_decisions)
         """
         self.resolution_decisions = []
+        self._stats = self._empty_stats()
         
         # Step 1: Update relationship entity IDs if mapping provided
         updated_relationships = relationships
         if entity_id_mapping:
             updated_relationships = self._update_relationship_entity_ids(relationships, entity_id_mapping)
         
-        # Step 2: Remove exact duplicates
-        deduplicated_relationships = self._remove_exact_duplicates(updated_relationships)
+        # Step 2: Remove exact duplicates; the same pass groups the survivors by
+        # entity pair for step 3
+        deduplicated_relationships, pair_groups = self._remove_exact_duplicates(updated_relationships)
         
         # Step 3: Consolidate relationships between same entity pairs
-        consolidated_relationships = self._consolidate_similar_relationships(deduplicated_relationships)
+        consolidated_relationships = self._consolidate_similar_relationships(
+            deduplicated_relationships, pair_groups
+        )
         
         return consolidated_relationships, self.resolution_decisions
     
@@ -68,93 +91,208 @@ class RelationshipResolver:
         entity_id_mapping: Dict[str, str]
     ) -> List[Relationship]:
         """Update relationship entity IDs based on entity resolution mapping."""
+        # Only a small share of entities is usually remapped; when none of
+        # them occurs in this batch the input is returned as is
+        mapped_ids = entity_id_mapping.keys()
+        if not any(
+            relationship.subject_id in mapped_ids or relationship.object_id in mapped_ids
+            for relationship in relationships
+        ):
+            return relationships
+        
         updated_relationships = []
         
         for relationship in relationships:
+            subject_id, object_id = relationship.subject_id, relationship.object_id
+            if subject_id not in mapped_ids and object_id not in mapped_ids:
+                updated_relationships.append(relationship)
+                continue
+            
             # Update subject and object IDs if they were merged
-            new_subject_id = entity_id_mapping.get(relationship.subject_id, relationship.subject_id)
-            new_object_id = entity_id_mapping.get(relationship.object_id, relationship.object_id)
+            new_subject_id = entity_id_mapping.get(subject_id, subject_id)
+            new_object_id = entity_id_mapping.get(object_id, object_id)
             
-            # Create updated relationship if IDs changed
-            if new_subject_id != relationship.subject_id or new_object_id != relationship.object_id:
-                updated_relationship = Relationship(
-                    id=relationship.id,
-                    subject_id=new_subject_id,
-                    predicate=relationship.predicate,
-                    object_id=new_object_id,
-                    confidence=relationship.confidence,
-                    context=relationship.context,
-                    source_chunk_id=relationship.source_chunk_id
-                )
-                updated_relationships.append(updated_relationship)
+            # Copy the relationship if IDs changed; the other fields were already
+            # validated, so model_copy skips re-validating them
+            if new_subject_id != subject_id or new_object_id != object_id:
+                updated_relationships.append(relationship.model_copy(
+                    update={"subject_id": new_subject_id, "object_id": new_object_id}
+                ))
             else:
                 updated_relationships.append(relationship)
         
         return updated_relationships
     
-    def _remove_exact_duplicates(self, relationships: List[Relationship]) -> List[Relationship]:
-        """Remove exact duplicate relationships."""
-        # Group relationships by their canonical form (subject, predicate, object)
-        canonical_groups = defaultdict(list)
+    def _remove_exact_duplicates(
+        self, 
+        relationships: List[Relationship]
+    ) -> Tuple[List[Relationship], List[Union[int, List[int]]]]:
+        """
+        Remove exact duplicate relationships.
         
-        for relationship in relationships:
-            canonical_key = (relationship.subject_id, relationship.predicate, relationship.object_id)
-            canonical_groups[canonical_key].append(relationship)
+        Returns:
+            Tuple of (deduplicated relationships, positions of the deduplicated
+            relationships grouped by unordered entity pair, see _group_by_entity_pair)
+        """
+        n = len(relationships)
+        
+        # Group relationships by their canonical form (subject, predicate, object);
+        # group codes follow first occurrence, so they are also the positions in
+        # the deduplicated list
+        canonical_keys = {}
+        groups = np.fromiter(
+            (
+                canonical_keys.setdefault((r.subject_id, r.predicate, r.object_id), len(canonical_keys))
+                for r in relationships
+            ),
+            dtype=np.intp,
+            count=n
+        )
+        
+        # File each canonical form under its unordered entity pair; the keys
+        # already hold both IDs, so no relationship is visited a second time
+        pair_groups = self._group_by_entity_pair(
+            (subject_id, object_id) for subject_id, _, object_id in canonical_keys
+        )
         
-        deduplicated = []
+        if len(canonical_keys) == n:
+            # No duplicates
+            return list(relationships), pair_groups
+        
+        # Members of groups with duplicates. Their fields are read in input
+        # order, then everything is regrouped by canonical form with numpy
+        group_sizes = np.bincount(groups)
+        members = np.flatnonzero(group_sizes[groups] > 1)
+        member_relationships = [relationships[i] for i in members.tolist()]
+        member_ids = np.array([r.id for r in member_relationships])
+        context_lengths = np.fromiter(
+            (len(r.context or "") for r in member_relationships), dtype=np.intp, count=len(members)
+        )
+        confidences = np.fromiter(
+            (r.confidence for r in member_relationships), dtype=np.float64, count=len(members)
+        )
         
-        for canonical_key, group_relationships in canonical_groups.items():
-            if len(group_relationships) == 1:
-                # No duplicates
-                deduplicated.append(group_relationships[0])
-            else:
-                # Multiple relationships with same subject-predicate-object
-                best_relationship = self._select_best_relationship(group_relationships)
-                deduplicated.append(best_relationship)
-                
-                # Record the resolution decision
-                duplicate_ids = [r.id for r in group_relationships if r.id != best_relationship.id]
-                if duplicate_ids:
-                    decision = RelationshipResolutionDecision(
-                        id=str(uuid.uuid4()),
-                        action=ResolutionActionType.KEEP_CANONICAL,
-                        canonical_relationship_id=best_relationship.id,
-                        merged_relationship_ids=duplicate_ids,
-                        consolidated_confidence=best_relationship.confidence,
-                        consolidation_method="exact_duplicate_removal",
-                        metadata={
-                            "canonical_form": f"{canonical_key[0]} --[{canonical_key[1]}]--> {canonical_key[2]}",
-                            "duplicates_removed": len(duplicate_ids),
-                            "consolidation_reason": "exact_subject_predicate_object_match"
-                        }
-                    )
-                    self.resolution_decisions.append(decision)
-        
-        return deduplicated
+        regroup = np.argsort(groups[members], kind="stable")
+        members = members[regroup]
+        member_groups = groups[members]
+        member_ids = member_ids[regroup]
+        
+        # Best relationship per group in one sort, using the same criteria as
+        # _select_best_relationship; among full ties the earliest one wins
+        order = np.lexsort((
+            -members,
+            member_ids,
+            context_lengths[regroup],
+            confidences[regroup],
+            member_groups
+        ))
+        sorted_groups = member_groups[order]
+        group_ends = np.flatnonzero(np.append(sorted_groups[1:] != sorted_groups[:-1], True))
+        
+        # One relationship per group, in first-occurrence order: the first member
+        # by default, the best one for groups with duplicates
+        kept = np.empty(len(canonical_keys), dtype=np.intp)
+        kept[groups[::-1]] = np.arange(n - 1, -1, -1)
+        kept[sorted_groups[group_ends]] = members[order[group_ends]]
+        kept = kept.tolist()
+        deduplicated = [relationships[i] for i in kept]
+        
+        # Record the resolution decisions, per group with duplicates in first-occurrence order
+        canonical_forms = list(canonical_keys)
+        member_ids = member_ids.tolist()
+        group_starts = np.flatnonzero(np.insert(member_groups[1:] != member_groups[:-1], 0, True))
+        group_ids = member_groups[group_starts].tolist()
+        group_bounds = np.append(group_starts, len(members)).tolist()
+        for k, group in enumerate(group_ids):
+            start, end = group_bounds[k], group_bounds[k + 1]
+            best_relationship = relationships[kept[group]]
+            duplicate_ids = [
+                rel_id for rel_id in member_ids[start:end] if rel_id != best_relationship.id
+            ]
+            if duplicate_ids:
+                metadata = {}
+                if self.record_metadata:
+                    canonical_key = canonical_forms[group]
+                    metadata = {
+                        "canonical_form": f"{canonical_key[0]} --[{canonical_key[1]}]--> {canonical_key[2]}",
+                        "duplicates_removed": len(duplicate_ids),
+                        "consolidation_reason": "exact_subject_predicate_object_match"
+                    }
+                decision = RelationshipResolutionDecision(
+                    id=self._new_decision_id(),
+                    action=ResolutionActionType.KEEP_CANONICAL,
+                    canonical_relationship_id=best_relationship.id,
+                    merged_relationship_ids=duplicate_ids,
+                    consolidated_confidence=best_relationship.confidence,
+                    consolidation_method="exact_duplicate_removal",
+                    metadata=metadata
+                )
+                self.resolution_decisions.append(decision)
+                self._stats["canonical_kept"] += 1
+                self._stats["exact_duplicates_removed"] += len(duplicate_ids)
+        
+        return deduplicated, pair_groups
     
-    def _consolidate_similar_relationships(self, relationships: List[Relationship]) -> List[Relationship]:
-        """Consolidate relationships that are semantically similar."""
-        # Group relationships by entity pair (ignoring predicate direction and type)
-        entity_pair_groups = defaultdict(list)
+    def _consolidate_similar_relationships(
+        self, 
+        relationships: List[Relationship],
+        pair_groups: Optional[List[Union[int, List[int]]]] = None
+    ) -> List[Relationship]:
+        """
+        Consolidate relationships that are semantically similar.
         
-        for relationship in relationships:
-            # Create bidirectional key to catch reverse relationships
-            pair_key = tuple(sorted([relationship.subject_id, relationship.object_id]))
-            entity_pair_groups[pair_key].append(relationship)
+        Args:
+            relationships: Relationships without exact duplicates
+            pair_groups: Positions of relationships grouped by unordered entity pair,
+                as returned by _remove_exact_duplicates; computed if omitted
+        """
+        if pair_groups is None:
+            pair_groups = self._group_by_entity_pair(
+                (r.subject_id, r.object_id) for r in relationships
+            )
+        
+        if len(pair_groups) == len(relationships):
+            # Every entity pair is unique: nothing to consolidate, and the groups
+            # are the relationships themselves in order
+            return list(relationships)
         
         consolidated = []
         
-        for pair_key, group_relationships in entity_pair_groups.items():
-            if len(group_relationships) == 1:
+        for members in pair_groups:
+            if type(members) is int:
                 # No consolidation needed
-                consolidated.append(group_relationships[0])
+                consolidated.append(relationships[members])
             else:
                 # Multiple relationships between same entity pair - analyze for consolidation
-                consolidated_group = self._consolidate_relationship_group(group_relationships)
+                consolidated_group = self._consolidate_relationship_group(
+                    [relationships[i] for i in members]
+                )
                 consolidated.extend(consolidated_group)
         
         return consolidated
     
+    @staticmethod
+    def _group_by_entity_pair(pairs: Iterable[Tuple[str, str]]) -> List[Union[int, List[int]]]:
+        """
+        Group positions by unordered (subject_id, object_id) pair, in first-seen order.
+        
+        A pair seen once is represented by its bare position and only pairs seen
+        again get a list, so the common single-relationship pair allocates nothing.
+        """
+        groups = {}
+        for i, (subject_id, object_id) in enumerate(pairs):
+            # Bidirectional key to catch reverse relationships; ordering the two
+            # IDs directly avoids building and sorting a list per relationship
+            pair_key = (subject_id, object_id) if subject_id <= object_id else (object_id, subject_id)
+            members = groups.get(pair_key)
+            if members is None:
+                groups[pair_key] = i
+            elif type(members) is int:
+                groups[pair_key] = [members, i]
+            else:
+                members.append(i)
+        return list(groups.values())
+    
     def _consolidate_relationship_group(self, relationships: List[Relationship]) -> List[Relationship]:
         """Consolidate a group of relationships between the same entity pair."""
         if len(relationships) <= 1:
@@ -182,11 +320,15 @@ class RelationshipResolver:
         if len(relationships) == 1:
             return relationships[0]
         
+        # Context lengths are shared by best-relationship selection and the
+        # weighted confidence average
+        context_lengths = [len(r.context or "") for r in relationships]
+        
         # Select the best base relationship
-        base_relationship = self._select_best_relationship(relationships)
+        base_relationship = self._select_best_relationship(relationships, context_lengths)
         
         # Consolidate confidence scores
-        consolidated_confidence = self._consolidate_confidence_scores(relationships)
+        consolidated_confidence = self._consolidate_confidence_scores(relationships, context_lengths)
         
         # Merge contexts
         consolidated_context = self._merge_contexts(relationships)
@@ -205,109 +347,175 @@ class RelationshipResolver:
         # Record the consolidation decision
         merged_ids = [r.id for r in relationships if r.id != base_relationship.id]
         if merged_ids:
+            metadata = {}
+            if self.record_metadata:
+                metadata = {
+                    "relationships_consolidated": len(relationships),
+                    "confidence_method": self.confidence_consolidation_method,
+                    "original_confidences": [r.confidence for r in relationships],
+                    "contexts_merged": len([r for r in relationships if r.context])
+                }
             decision = RelationshipResolutionDecision(
-                id=str(uuid.uuid4()),
+                id=self._new_decision_id(),
                 action=ResolutionActionType.CONSOLIDATE_RELATIONSHIPS,
                 canonical_relationship_id=base_relationship.id,
                 merged_relationship_ids=merged_ids,
                 consolidated_confidence=consolidated_confidence,
                 consolidation_method=f"predicate_group_{self.confidence_consolidation_method}",
-                metadata={
-                    "relationships_consolidated": len(relationships),
-                    "confidence_method": self.confidence_consolidation_method,
-                    "original_confidences": [r.confidence for r in relationships],
-                    "contexts_merged": len([r for r in relationships if r.context])
-                }
+                metadata=metadata
             )
             self.resolution_decisions.append(decision)
+            self._stats["relationships_consolidated"] += len(merged_ids)
         
         return consolidated_relationship
     
-    def _select_best_relationship(self, relationships: List[Relationship]) -> Relationship:
-        """Select the best relationship from a group."""
+    def _select_best_relationship(
+        self, 
+        relationships: List[Relationship],
+        context_lengths: Optional[List[int]] = None
+    ) -> Relationship:
+        """
+        Select the best relationship from a group.
+        
+        Args:
+            relationships: Relationships to choose from
+            context_lengths: Precomputed len(context) per relationship, if available
+        """
         if len(relationships) == 1:
             return relationships[0]
         
+        if context_lengths is None:
+            context_lengths = [len(r.context or "") for r in relationships]
+        
+        if len(relationships) == 2:
+            # After exact duplicate removal, predicate groups hold at most a
+            # relationship and its reverse, so compare the pair field by field;
+            # the first one wins full ties, as with max()
+            first, second = relationships
+            if first.confidence != second.confidence:
+                return first if first.confidence > second.confidence else second
+            first_length, second_length = context_lengths
+            if first_length != second_length:
+                return first if first_length > second_length else second
+            return second if second.id > first.id else first
+        
         # Selection criteria (in order of priority):
         # 1. Highest confidence
         # 2. Most detailed context
         # 3. Most recent (by ID lexicographic order as proxy)
         
-        best_relationship = max(relationships, key=lambda r: (
-            r.confidence,
-            len(r.context or ""),
-            r.id
+        best_index = max(range(len(relationships)), key=lambda i: (
+            relationships[i].confidence,
+            context_lengths[i],
+            relationships[i].id
         ))
         
-        return best_relationship
+        return relationships[best_index]
     
-    def _consolidate_confidence_scores(self, relationships: List[Relationship]) -> float:
-        """Consolidate confidence scores from multiple relationships."""
+    def _consolidate_confidence_scores(
+        self, 
+        relationships: List[Relationship],
+        context_lengths: Optional[List[int]] = None
+    ) -> float:
+        """
+        Consolidate confidence scores from multiple relationships.
+        
+        Args:
+            relationships: Relationships whose scores are consolidated
+            context_lengths: Precomputed len(context) per relationship, if available
+        """
         if len(relationships) == 1:
             return relationships[0].confidence
         
+        return self._consolidate_confidence(relationships, context_lengths)
+    
+    @staticmethod
+    def _max_confidence(
+        relationships: List[Relationship],
+        context_lengths: Optional[List[int]] = None
+    ) -> float:
+        """Take the maximum confidence (also the fallback for unknown methods)."""
+        return max(r.confidence for r in relationships)
+    
+    @staticmethod
+    def _average_confidence(
+        relationships: List[Relationship],
+        context_lengths: Optional[List[int]] = None
+    ) -> float:
+        """Average all confidence scores."""
+        return sum(r.confidence for r in relationships) / len(relationships)
+    
+    @staticmethod
+    def _weighted_confidence(
+        relationships: List[Relationship],
+        context_lengths: Optional[List[int]] = None
+    ) -> float:
+        """Average confidence scores weighted by context length."""
         confidences = [r.confidence for r in relationships]
         
-        if self.confidence_consolidation_method == "max":
-            return max(confidences)
-        elif self.confidence_consolidation_method == "average":
-            return sum(confidences) / len(confidences)
-        elif self.confidence_consolidation_method == "weighted":
-            # Weight by context length
-            weights = []
-            for r in relationships:
-                context_length = len(r.context or "")
-                weight = max(1, context_length)  # Minimum weight of 1
-                weights.append(weight)
-            
-            total_weight = sum(weights)
-            weighted_sum = sum(conf * weight for conf, weight in zip(confidences, weights))
-            return weighted_sum / total_weight if total_weight > 0 else sum(confidences) / len(confidences)
-        else:
-            # Default to max
-            return max(confidences)
+        if context_lengths is None:
+            context_lengths = [len(r.context or "") for r in relationships]
+        
+        if len(relationships) >= _NUMPY_MIN_WEIGHTED:
+            # Minimum weight of 1, so the total weight is always positive
+            weights = np.maximum(np.array(context_lengths, dtype=np.int64), 1)
+            return float(np.average(confidences, weights=weights))
+        
+        weights = [max(1, context_length) for context_length in context_lengths]  # Minimum weight of 1
+        
+        total_weight = sum(weights)
+        weighted_sum = sum(conf * weight for conf, weight in zip(confidences, weights))
+        return weighted_sum / total_weight if total_weight > 0 else sum(confidences) / len(confidences)
     
     def _merge_contexts(self, relationships: List[Relationship]) -> Optional[str]:
         """Merge context strings from multiple relationships."""
-        contexts = [r.context for r in relationships if r.context and r.context.strip()]
-        
-        if not contexts:
+        # Each context is stripped once, both to skip blank ones and to build the
+        # duplicate key. Duplicates are removed ignoring case (casefold, so e.g.
+        # "STRASSE" and "straße" match) while preserving order; the first
+        # spelling of each context is kept
+        unique_contexts = {}
+        first_context = None
+        context_count = 0
+        for r in relationships:
+            context = r.context
+            if not context:
+                continue
+            stripped = context.strip()
+            if not stripped:
+                continue
+            if first_context is None:
+                first_context = context
+            context_count += 1
+            unique_contexts.setdefault(stripped.casefold(), stripped)
+        
+        if not unique_contexts:
             return None
         
-        if len(contexts) == 1:
-            return contexts[0]
-        
-        # Remove duplicates while preserving order
-        unique_contexts = []
-        seen = set()
-        
-        for context in contexts:
-            context_lower = context.lower().strip()
-            if context_lower not in seen:
-                unique_contexts.append(context.strip())
-                seen.add(context_lower)
+        if context_count == 1:
+            return first_context
         
         # Join with separator if multiple unique contexts
-        if len(unique_contexts) > 1:
-            return " | ".join(unique_contexts)
-        else:
-            return unique_contexts[0] if unique_contexts else None
+        return " | ".join(unique_contexts.values())
     
-    def get_consolidation_stats(self) -> Dict[str, int]:
-        """Get statistics about the consolidation process."""
-        stats = {
-            "total_decisions": len(self.resolution_decisions),
+    def _new_decision_id(self) -> str:
+        """Return a random 128-bit hex ID for a resolution decision."""
+        if not self._decision_ids:
+            # One urandom call and one hex conversion for a whole batch of IDs
+            # instead of building a UUID object per decision
+            pool = os.urandom(16 * _DECISION_ID_BATCH).hex()
+            self._decision_ids = [pool[i:i + 32] for i in range(0, len(pool), 32)]
+        return self._decision_ids.pop()
+    
+    @staticmethod
+    def _empty_stats() -> Dict[str, int]:
+        """Zeroed counters for get_consolidation_stats."""
+        return {
             "exact_duplicates_removed": 0,
             "relationships_consolidated": 0,
             "canonical_kept": 0
         }
-        
-        for decision in self.resolution_decisions:
-            if decision.action == ResolutionActionType.KEEP_CANONICAL:
-                stats["canonical_kept"] += 1
-                if "exact_duplicate_removal" in decision.consolidation_method:
-                    stats["exact_duplicates_removed"] += len(decision.merged_relationship_ids)
-            elif decision.action == ResolutionActionType.CONSOLIDATE_RELATIONSHIPS:
-                stats["relationships_consolidated"] += len(decision.merged_relationship_ids)
-        
-        return stats
\ No newline at end of file
+    
+    def get_consolidation_stats(self) -> Dict[str, int]:
+        """Get statistics about the consolidation process."""
+        # Counters are updated as each decision is recorded
+        return {"total_decisions": len(self.resolution_decisions), **self._stats}
@@ -18,10 +18,14 @@ import sys
 import os
 import argparse
 import time
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Any, Optional
 from datetime import datetime
 from dotenv import load_dotenv
+from rapidfuzz import fuzz
 
 # Add the parent directory to Python path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -38,6 +42,9 @@ from data_resolution import (
 
 load_dotenv()
 
+# Name scorers selectable through ENTITY_NAME_SCORER and CONNECTION_NAME_SCORER
+_NAME_SCORERS = {"partial_ratio": fuzz.partial_ratio, "ratio": fuzz.ratio}
+
 
 def load_config() -> Dict[str, Any]:
     """Load configuration from environment variables with defaults."""
@@ -50,7 +57,13 @@ def load_config() -> Dict[str, Any]:
         "entity_similarity_threshold": float(os.getenv("ENTITY_SIMILARITY_THRESHOLD", "80.0")),
         "entity_acronym_threshold": float(os.getenv("ENTITY_ACRONYM_THRESHOLD", "98.0")),
         "connection_similarity_threshold": float(os.getenv("CONNECTION_SIMILARITY_THRESHOLD", "0.6")),
+        "connection_name_scorer": os.getenv("CONNECTION_NAME_SCORER", "partial_ratio"),
         "confidence_consolidation_method": os.getenv("CONFIDENCE_CONSOLIDATION_METHOD", "max"),
+        "entity_name_scorer": os.getenv("ENTITY_NAME_SCORER", "partial_ratio"),
+        
+        # Performance settings; worker count does not change results, blocking can
+        "entity_resolution_workers": int(os.getenv("ENTITY_RESOLUTION_WORKERS", "1")),
+        "enable_entity_blocking": os.getenv("ENABLE_ENTITY_BLOCKING", "false").lower() == "true",
         
         # Feature toggles
         "enable_acronym_matching": os.getenv("ENABLE_ACRONYM_MATCHING", "true").lower() == "true",
@@ -63,6 +76,16 @@ def load_config() -> Dict[str, Any]:
     }
 
 
+def _get_name_scorer(config, key: str):
+    """Look up the RapidFuzz scorer named by config[key]."""
+    name_scorer = _NAME_SCORERS.get(config[key])
+    if name_scorer is None:
+        raise ValueError(
+            f"Unknown {key.upper()} {config[key]!r}; expected one of {sorted(_NAME_SCORERS)}"
+        )
+    return name_scorer
+
+
 def load_data_from_database(db_interface, extraction_run_ids: Optional[list] = None, verbose: bool = True):
     """Load entities and relationships from the database."""
     if verbose:
@@ -85,10 +108,26 @@ def load_data_from_database(db_interface, extraction_run_ids: Optional[list] = N
             if verbose:
                 print(f"✓ Found {len(extraction_run_ids)} extraction runs")
         
+        # Load all runs with one query per table; if that fails, fall back to
+        # loading run by run so a single bad run only skips that run. Triplets
+        # are not used by resolution, so they are not loaded at all
+        try:
+            extraction_results = db_interface.get_extraction_results_bulk(
+                extraction_run_ids, include_triplets=False
+            )
+        except Exception as e:
+            extraction_results = None
+            if verbose:
+                print(f"  ⚠️ Bulk load failed ({e}), loading runs one at a time")
+        
         # Load data from each extraction run
         for run_id in extraction_run_ids:
             try:
-                extraction_result = db_interface.get_extraction_result(run_id)
+                if extraction_results is not None:
+                    # Drop each result once consumed so it can be freed early
+                    extraction_result = extraction_results.pop(run_id, None)
+                else:
+                    extraction_result = db_interface.get_extraction_result(run_id)
                 if extraction_result:
                     entities.extend(extraction_result.entities)
                     relationships.extend(extraction_result.relationships)
@@ -116,7 +155,10 @@ def run_entity_resolution(entities, config, verbose: bool = True):
     resolver = EntityResolver(
         similarity_threshold=config["entity_similarity_threshold"],
         acronym_threshold=config["entity_acronym_threshold"],
-        enable_acronym_matching=config["enable_acronym_matching"]
+        enable_acronym_matching=config["enable_acronym_matching"],
+        enable_blocking=config["enable_entity_blocking"],
+        workers=config["entity_resolution_workers"],
+        name_scorer=_get_name_scorer(config, "entity_name_scorer")
     )
     
     start_time = time.time()
@@ -140,10 +182,11 @@ def run_relationship_resolution(relationships, entity_decisions, config, verbose
         print(f"\n🔗 Step 2: Relationship Resolution ({len(relationships)} relationships)")
     
     # Build entity ID mapping from resolution decisions
-    entity_id_mapping = {}
-    for decision in entity_decisions:
-        for duplicate_id in decision.duplicate_entity_ids:
-            entity_id_mapping[duplicate_id] = decision.canonical_entity_id
+    entity_id_mapping = {
+        duplicate_id: decision.canonical_entity_id
+        for decision in entity_decisions
+        for duplicate_id in decision.duplicate_entity_ids
+    }
     
     resolver = RelationshipResolver(
         confidence_consolidation_method=config["confidence_consolidation_method"]
@@ -167,33 +210,44 @@ def run_relationship_resolution(relationships, entity_decisions, config, verbose
     return consolidated_relationships, relationship_decisions, resolution_time
 
 
-def run_connection_discovery(entities, relationships, config, verbose: bool = True):
-    """Run connection discovery to find new potential relationships."""
-    if verbose:
-        print(f"\n🔍 Step 3: Connection Discovery")
-    
-    discoverer = ConnectionDiscoverer(
+def create_connection_discoverer(config) -> ConnectionDiscoverer:
+    """Create a connection discoverer from the configuration."""
+    return ConnectionDiscoverer(
         similarity_threshold=config["connection_similarity_threshold"],
         enable_transitive_discovery=config["enable_transitive_discovery"],
-        enable_domain_rules=config["enable_domain_rules"]
+        enable_domain_rules=config["enable_domain_rules"],
+        name_scorer=_get_name_scorer(config, "connection_name_scorer")
     )
+
+
+def run_connection_discovery(entities, relationships, config, verbose: bool = True, similarity_matrices=None):
+    """Run connection discovery to find new potential relationships.
+    
+    similarity_matrices, if given, are the entities' precomputed name and
+    description similarity matrices (see ConnectionDiscoverer.compute_similarity_matrices).
+    """
+    if verbose:
+        print(f"\n🔍 Step 3: Connection Discovery")
+    
+    discoverer = create_connection_discoverer(config)
     
     start_time = time.time()
-    discovered_connections = discoverer.discover_connections(entities, relationships)
+    discovered_connections = discoverer.discover_connections(
+        entities, relationships, similarity_matrices
+    )
     discovery_time = time.time() - start_time
     
-    # Filter by minimum confidence and limit results
-    high_confidence_discoveries = [
-        d for d in discovered_connections 
-        if d.confidence >= config["min_discovery_confidence"]
-    ]
+    # Filter by minimum confidence and limit results. Discoveries come sorted
+    # by confidence, highest first, so both are a cut-off point in the list
+    high_confidence_count = bisect_right(
+        discovered_connections, -config["min_discovery_confidence"], key=lambda d: -d.confidence
+    )
     
     # Limit results if specified
     max_discoveries = config["max_discoveries_per_run"]
-    if len(high_confidence_discoveries) > max_discoveries:
-        high_confidence_discoveries = high_confidence_discoveries[:max_discoveries]
-        if verbose:
-            print(f"  ⚠️ Limited to top {max_discoveries} discoveries")
+    high_confidence_discoveries = discovered_connections[:min(high_confidence_count, max_discoveries)]
+    if high_confidence_count > max_discoveries and verbose:
+        print(f"  ⚠️ Limited to top {max_discoveries} discoveries")
     
     if verbose:
         print(f"✓ Connection discovery completed in {discovery_time:.2f}s")
@@ -201,9 +255,7 @@ def run_connection_discovery(entities, relationships, config, verbose: bool = Tr
         print(f"  High-confidence discoveries: {len(high_confidence_discoveries)}")
         
         # Show discovery methods breakdown
-        method_counts = {}
-        for d in high_confidence_discoveries:
-            method_counts[d.discovery_method] = method_counts.get(d.discovery_method, 0) + 1
+        method_counts = Counter(d.discovery_method for d in high_confidence_discoveries)
         
         print("  Discovery methods:")
         for method, count in sorted(method_counts.items()):
@@ -247,55 +299,60 @@ def print_resolution_summary(resolution_result: ResolutionResult, verbose: bool
     if not verbose:
         return
     
-    print("\n" + "=" * 80)
-    print("DATA RESOLUTION PIPELINE RESULTS")
-    print("=" * 80)
+    # Built up and written in one go rather than one print() per line
+    lines = []
+    
+    lines.append("\n" + "=" * 80)
+    lines.append("DATA RESOLUTION PIPELINE RESULTS")
+    lines.append("=" * 80)
     
     stats = resolution_result.stats
     
-    print(f"\n📊 Overall Statistics:")
-    print(f"  Run ID: {resolution_result.run_id}")
-    print(f"  Timestamp: {resolution_result.timestamp.strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"  Total processing time: {stats.resolution_duration_seconds:.2f} seconds")
+    lines.append(f"\n📊 Overall Statistics:")
+    lines.append(f"  Run ID: {resolution_result.run_id}")
+    lines.append(f"  Timestamp: {resolution_result.timestamp.strftime('%Y-%m-%d %H:%M:%S')}")
+    lines.append(f"  Total processing time: {stats.resolution_duration_seconds:.2f} seconds")
     
-    print(f"\n🏷️ Entity Resolution:")
-    print(f"  Entities processed: {stats.entities_processed}")
-    print(f"  Entities merged: {stats.entities_merged}")
-    print(f"  Duplicate entities removed: {stats.duplicate_entities_removed}")
-    print(f"  Entity merge rate: {stats.entity_merge_rate:.1%}")
-    print(f"  Final canonical entities: {len(resolution_result.canonical_entities)}")
+    lines.append(f"\n🏷️ Entity Resolution:")
+    lines.append(f"  Entities processed: {stats.entities_processed}")
+    lines.append(f"  Entities merged: {stats.entities_merged}")
+    lines.append(f"  Duplicate entities removed: {stats.duplicate_entities_removed}")
+    lines.append(f"  Entity merge rate: {stats.entity_merge_rate:.1%}")
+    lines.append(f"  Final canonical entities: {len(resolution_result.canonical_entities)}")
     
-    print(f"\n🔗 Relationship Resolution:")
-    print(f"  Relationships processed: {stats.relationships_processed}")
-    print(f"  Relationships consolidated: {stats.relationships_consolidated}")
-    print(f"  Relationship consolidation rate: {stats.relationship_consolidation_rate:.1%}")
-    print(f"  Final consolidated relationships: {len(resolution_result.consolidated_relationships)}")
+    lines.append(f"\n🔗 Relationship Resolution:")
+    lines.append(f"  Relationships processed: {stats.relationships_processed}")
+    lines.append(f"  Relationships consolidated: {stats.relationships_consolidated}")
+    lines.append(f"  Relationship consolidation rate: {stats.relationship_consolidation_rate:.1%}")
+    lines.append(f"  Final consolidated relationships: {len(resolution_result.consolidated_relationships)}")
     
-    print(f"\n🎯 Connection Discovery:")
-    print(f"  New connections discovered: {stats.new_connections_discovered}")
+    lines.append(f"\n🎯 Connection Discovery:")
+    lines.append(f"  New connections discovered: {stats.new_connections_discovered}")
     
     if resolution_result.discovered_connections:
-        print(f"\n📋 Top Discoveries (by confidence):")
+        lines.append(f"\n📋 Top Discoveries (by confidence):")
         for i, discovery in enumerate(resolution_result.discovered_connections[:5]):
-            print(f"  {i+1}. Confidence: {discovery.confidence:.3f}")
-            print(f"     Method: {discovery.discovery_method}")
-            print(f"     Connection: {discovery.subject_entity_id} --[{discovery.suggested_predicate.value}]--> {discovery.object_entity_id}")
+            lines.append(f"  {i+1}. Confidence: {discovery.confidence:.3f}")
+            lines.append(f"     Method: {discovery.discovery_method}")
+            lines.append(f"     Connection: {discovery.subject_entity_id} --[{discovery.suggested_predicate.value}]--> {discovery.object_entity_id}")
             if discovery.supporting_evidence:
-                print(f"     Evidence: {discovery.supporting_evidence[0]}")
+                lines.append(f"     Evidence: {discovery.supporting_evidence[0]}")
     
     # Show entity resolution decisions
     if resolution_result.entity_decisions:
-        print(f"\n🔍 Entity Resolution Examples:")
+        lines.append(f"\n🔍 Entity Resolution Examples:")
         for i, decision in enumerate(resolution_result.entity_decisions[:3]):
-            print(f"  {i+1}. Method: {decision.resolution_method}")
-            print(f"     Canonical: {decision.canonical_entity_id}")
-            print(f"     Merged: {len(decision.duplicate_entity_ids)} duplicates")
-            print(f"     Similarity: {decision.similarity_score:.3f}")
-    
-    print(f"\n💡 Next Steps:")
-    print(f"  • Review high-confidence discoveries for manual validation")
-    print(f"  • Consider adjusting similarity thresholds based on results")
-    print(f"  • Use resolved canonical entities for downstream processing")
+            lines.append(f"  {i+1}. Method: {decision.resolution_method}")
+            lines.append(f"     Canonical: {decision.canonical_entity_id}")
+            lines.append(f"     Merged: {len(decision.duplicate_entity_ids)} duplicates")
+            lines.append(f"     Similarity: {decision.similarity_score:.3f}")
+    
+    lines.append(f"\n💡 Next Steps:")
+    lines.append(f"  • Review high-confidence discoveries for manual validation")
+    lines.append(f"  • Consider adjusting similarity thresholds based on results")
+    lines.append(f"  • Use resolved canonical entities for downstream processing")
+    
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def main():
@@ -311,6 +368,8 @@ def main():
                        help="Override connection discovery threshold")
     parser.add_argument("--max-discoveries", type=int,
                        help="Maximum number of discoveries to return")
+    parser.add_argument("--entity-workers", type=int,
+                       help="Processes for resolving entity types in parallel (1 disables)")
     
     args = parser.parse_args()
     
@@ -328,6 +387,8 @@ def main():
         config["connection_similarity_threshold"] = args.connection_threshold
     if args.max_discoveries:
         config["max_discoveries_per_run"] = args.max_discoveries
+    if args.entity_workers:
+        config["entity_resolution_workers"] = args.entity_workers
     if args.dry_run:
         config["enable_database_storage"] = False
     
@@ -364,15 +425,24 @@ def main():
             entities, config, verbose
         )
         
-        # Step 2: Relationship Resolution  
-        consolidated_relationships, relationship_decisions, relationship_time = run_relationship_resolution(
-            relationships, entity_decisions, config, verbose
-        )
-        
-        # Step 3: Connection Discovery
-        discovered_connections, discovery_time = run_connection_discovery(
-            canonical_entities, consolidated_relationships, config, verbose
-        )
+        # Connection discovery scores similarity among the canonical entities
+        # only, so start that now. The scoring runs in native threads without
+        # the GIL, overlapping relationship resolution.
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            similarity_matrices = executor.submit(
+                create_connection_discoverer(config).compute_similarity_matrices, canonical_entities
+            )
+            
+            # Step 2: Relationship Resolution  
+            consolidated_relationships, relationship_decisions, relationship_time = run_relationship_resolution(
+                relationships, entity_decisions, config, verbose
+            )
+            
+            # Step 3: Connection Discovery
+            discovered_connections, discovery_time = run_connection_discovery(
+                canonical_entities, consolidated_relationships, config, verbose,
+                similarity_matrices=similarity_matrices.result()
+            )
         
         total_time = time.time() - start_total_time
         
@@ -1,9 +1,10 @@
 """Database interface for entity extraction results storage and retrieval."""
 
 import os
+from collections import defaultdict
 from typing import List, Dict, Any, Optional
 from contextlib import contextmanager
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, func, insert, select
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
 import logging
@@ -19,6 +20,18 @@ from .models import (
 
 logger = logging.getLogger(__name__)
 
+# Run IDs per IN (...) query when loading several extraction runs at once
+_BULK_QUERY_BATCH_SIZE = 500
+
+
+def _count_children(foreign_key_column, parent_id_column):
+    """Correlated subquery counting the child rows that point at each parent row.
+    
+    Lets run listings report child counts in the same query as the runs instead
+    of loading every child object just to take len() of the collection.
+    """
+    return select(func.count()).where(foreign_key_column == parent_id_column).scalar_subquery()
+
 
 class DatabaseInterface:
     """Interface for database operations related to entity extraction."""
@@ -186,11 +199,66 @@ class DatabaseInterface:
             logger.error(f"Failed to retrieve extraction result: {e}")
             raise
     
+    def get_extraction_results_bulk(
+        self,
+        extraction_run_ids: List[str],
+        include_triplets: bool = True
+    ) -> Dict[str, ExtractionResult]:
+        """Retrieve extraction results for several runs with one query per table.
+        
+        Returns a mapping from run ID to extraction result, in the order of
+        extraction_run_ids; runs that do not exist are left out. With
+        include_triplets=False the triplets table is not read and every result
+        has an empty triplets list, for callers that only need entities and
+        relationships.
+        """
+        try:
+            with self.get_session() as session:
+                runs = {}
+                entities = defaultdict(list)
+                relationships = defaultdict(list)
+                triplets = defaultdict(list)
+                
+                # Batches keep each IN list under SQLite's bound-parameter limit
+                for start in range(0, len(extraction_run_ids), _BULK_QUERY_BATCH_SIZE):
+                    batch = extraction_run_ids[start:start + _BULK_QUERY_BATCH_SIZE]
+                    
+                    for extraction_run in session.query(ExtractionRun).filter(ExtractionRun.id.in_(batch)):
+                        runs[extraction_run.id] = extraction_run
+                    
+                    # Plain rows instead of ORM instances: they are only read once for
+                    # conversion, so identity-map and change-tracking setup is skipped
+                    tables = [(EntityDB, entities), (RelationshipDB, relationships)]
+                    if include_triplets:
+                        tables.append((TripletDB, triplets))
+                    for model, rows_by_run in tables:
+                        table = model.__table__
+                        for row in session.execute(select(table).where(table.c.extraction_run_id.in_(batch))):
+                            rows_by_run[row.extraction_run_id].append(row)
+                
+                # Convert back to extraction results, run by run
+                return {
+                    run_id: convert_db_models_to_extraction_result(
+                        runs[run_id], entities[run_id], relationships[run_id], triplets[run_id]
+                    )
+                    for run_id in extraction_run_ids
+                    if run_id in runs
+                }
+        
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to retrieve extraction results: {e}")
+            raise
+    
     def list_extraction_runs(self, limit: int = 100) -> List[Dict[str, Any]]:
         """List recent extraction runs with basic info."""
         try:
             with self.get_session() as session:
-                runs = session.query(ExtractionRun).order_by(
+                runs = session.query(
+                    ExtractionRun,
+                    _count_children(EntityDB.extraction_run_id, ExtractionRun.id),
+                    _count_children(RelationshipDB.extraction_run_id, ExtractionRun.id),
+                    _count_children(TripletDB.extraction_run_id, ExtractionRun.id)
+                ).order_by(
                     ExtractionRun.timestamp.desc()
                 ).limit(limit).all()
                 
@@ -200,11 +268,11 @@ class DatabaseInterface:
                         "timestamp": run.timestamp.isoformat(),
                         "total_chunks_processed": run.total_chunks_processed,
                         "source_document": run.source_document,
-                        "entities_count": len(run.entities),
-                        "relationships_count": len(run.relationships),
-                        "triplets_count": len(run.triplets)
+                        "entities_count": entities_count,
+                        "relationships_count": relationships_count,
+                        "triplets_count": triplets_count
                     }
-                    for run in runs
+                    for run, entities_count, relationships_count, triplets_count in runs
                 ]
                 
         except SQLAlchemyError as e:
@@ -379,54 +447,62 @@ class DatabaseInterface:
                     resolution_duration_seconds=resolution_result.stats.resolution_duration_seconds
                 )
                 session.add(resolution_run)
+                # autoflush is off; the run row must exist before its decisions
+                session.flush()
+                
+                # Decisions and discoveries go in as executemany INSERTs from plain
+                # dicts, skipping the mapped object and unit-of-work bookkeeping per row
                 
                 # Save entity resolution decisions
-                for decision in resolution_result.entity_decisions:
-                    db_decision = EntityResolutionDecisionDB(
-                        id=decision.id,
-                        resolution_run_id=resolution_result.run_id,
-                        canonical_entity_id=decision.canonical_entity_id,
-                        duplicate_entity_ids=decision.duplicate_entity_ids,
-                        similarity_score=decision.similarity_score,
-                        resolution_method=decision.resolution_method,
-                        confidence=decision.confidence,
-                        decision_metadata=decision.metadata,
-                        timestamp=decision.timestamp
-                    )
-                    session.add(db_decision)
+                self._bulk_insert(session, EntityResolutionDecisionDB, [
+                    {
+                        "id": decision.id,
+                        "resolution_run_id": resolution_result.run_id,
+                        "canonical_entity_id": decision.canonical_entity_id,
+                        "duplicate_entity_ids": decision.duplicate_entity_ids,
+                        "similarity_score": decision.similarity_score,
+                        "resolution_method": decision.resolution_method,
+                        "confidence": decision.confidence,
+                        "decision_metadata": decision.metadata,
+                        "timestamp": decision.timestamp
+                    }
+                    for decision in resolution_result.entity_decisions
+                ])
                 
                 # Save relationship resolution decisions
-                for decision in resolution_result.relationship_decisions:
-                    db_decision = RelationshipResolutionDecisionDB(
-                        id=decision.id,
-                        resolution_run_id=resolution_result.run_id,
-                        action=decision.action.value,
-                        canonical_relationship_id=decision.canonical_relationship_id,
-                        merged_relationship_ids=decision.merged_relationship_ids,
-                        consolidated_confidence=decision.consolidated_confidence,
-                        consolidation_method=decision.consolidation_method,
-                        decision_metadata=decision.metadata,
-                        timestamp=decision.timestamp
-                    )
-                    session.add(db_decision)
+                self._bulk_insert(session, RelationshipResolutionDecisionDB, [
+                    {
+                        "id": decision.id,
+                        "resolution_run_id": resolution_result.run_id,
+                        "action": decision.action.value,
+                        "canonical_relationship_id": decision.canonical_relationship_id,
+                        "merged_relationship_ids": decision.merged_relationship_ids,
+                        "consolidated_confidence": decision.consolidated_confidence,
+                        "consolidation_method": decision.consolidation_method,
+                        "decision_metadata": decision.metadata,
+                        "timestamp": decision.timestamp
+                    }
+                    for decision in resolution_result.relationship_decisions
+                ])
                 
                 # Save discovered connections
-                for discovery in resolution_result.discovered_connections:
-                    db_discovery = ConnectionDiscoveryDB(
-                        id=discovery.id,
-                        resolution_run_id=resolution_result.run_id,
-                        subject_entity_id=discovery.subject_entity_id,
-                        object_entity_id=discovery.object_entity_id,
-                        suggested_predicate=discovery.suggested_predicate.value,
-                        confidence=discovery.confidence,
-                        discovery_method=discovery.discovery_method,
-                        supporting_evidence=discovery.supporting_evidence,
-                        similarity_features=discovery.similarity_features,
-                        discovery_metadata=discovery.metadata,
-                        timestamp=discovery.timestamp,
-                        status="discovered"
-                    )
-                    session.add(db_discovery)
+                self._bulk_insert(session, ConnectionDiscoveryDB, [
+                    {
+                        "id": discovery.id,
+                        "resolution_run_id": resolution_result.run_id,
+                        "subject_entity_id": discovery.subject_entity_id,
+                        "object_entity_id": discovery.object_entity_id,
+                        "suggested_predicate": discovery.suggested_predicate.value,
+                        "confidence": discovery.confidence,
+                        "discovery_method": discovery.discovery_method,
+                        "supporting_evidence": discovery.supporting_evidence,
+                        "similarity_features": discovery.similarity_features,
+                        "discovery_metadata": discovery.metadata,
+                        "timestamp": discovery.timestamp,
+                        "status": "discovered"
+                    }
+                    for discovery in resolution_result.discovered_connections
+                ])
                 
                 session.commit()
                 logger.info(f"Saved resolution result: {resolution_result.run_id}")
@@ -436,17 +512,26 @@ class DatabaseInterface:
             logger.error(f"Failed to save resolution result: {e}")
             raise
     
+    @staticmethod
+    def _bulk_insert(session, model, rows: List[Dict[str, Any]]) -> None:
+        """Insert rows for model in one executemany statement; no-op when empty."""
+        if rows:
+            session.execute(insert(model), rows)
+    
     def get_resolution_result(self, resolution_run_id: str):
         """Get resolution result by run ID."""
         try:
             with self.get_session() as session:
-                resolution_run = session.query(ResolutionRun).filter(
+                row = session.query(
+                    ResolutionRun, *self._resolution_run_counts()
+                ).filter(
                     ResolutionRun.id == resolution_run_id
                 ).first()
                 
-                if not resolution_run:
+                if not row:
                     return None
                 
+                resolution_run, entity_decisions_count, relationship_decisions_count, discovered_connections_count = row
                 # TODO: Convert back to ResolutionResult object if needed
                 return {
                     "run_id": resolution_run.id,
@@ -454,20 +539,31 @@ class DatabaseInterface:
                     "source_extraction_run_ids": resolution_run.source_extraction_run_ids,
                     "resolution_stats": resolution_run.resolution_stats,
                     "config_used": resolution_run.config_used,
-                    "entity_decisions_count": len(resolution_run.entity_decisions),
-                    "relationship_decisions_count": len(resolution_run.relationship_decisions),
-                    "discovered_connections_count": len(resolution_run.discovered_connections)
+                    "entity_decisions_count": entity_decisions_count,
+                    "relationship_decisions_count": relationship_decisions_count,
+                    "discovered_connections_count": discovered_connections_count
                 }
                 
         except SQLAlchemyError as e:
             logger.error(f"Failed to get resolution result: {e}")
             raise
     
+    @staticmethod
+    def _resolution_run_counts():
+        """Decision and discovery count subqueries for resolution run listings."""
+        return (
+            _count_children(EntityResolutionDecisionDB.resolution_run_id, ResolutionRun.id),
+            _count_children(RelationshipResolutionDecisionDB.resolution_run_id, ResolutionRun.id),
+            _count_children(ConnectionDiscoveryDB.resolution_run_id, ResolutionRun.id)
+        )
+    
     def list_resolution_runs(self) -> List[Dict[str, Any]]:
         """List all resolution runs with summary information."""
         try:
             with self.get_session() as session:
-                runs = session.query(ResolutionRun).order_by(ResolutionRun.timestamp.desc()).all()
+                runs = session.query(
+                    ResolutionRun, *self._resolution_run_counts()
+                ).order_by(ResolutionRun.timestamp.desc()).all()
                 
                 return [
                     {
@@ -475,12 +571,13 @@ class DatabaseInterface:
                         "timestamp": run.timestamp,
                         "source_extraction_runs": run.source_extraction_run_ids,
                         "resolution_duration_seconds": run.resolution_duration_seconds,
-                        "entity_decisions_count": len(run.entity_decisions),
-                        "relationship_decisions_count": len(run.relationship_decisions),
-                        "discovered_connections_count": len(run.discovered_connections),
-                        "stats": run.resolution_stats
+                        "entity_decisions_count": entity_decisions_count,
+                        "relationship_decisions_count": relationship_decisions_count,
+                        "discovered_connections_count": discovered_connections_count,
+                        "stats": run.resolution_stats,
+                        "config_used": run.config_used
                     }
-                    for run in runs
+                    for run, entity_decisions_count, relationship_decisions_count, discovered_connections_count in runs
                 ]
                 
         except SQLAlchemyError as e: